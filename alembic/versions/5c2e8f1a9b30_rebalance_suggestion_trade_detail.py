@@ -0,0 +1,34 @@
+"""rebalance suggestion trade detail
+
+Revision ID: 5c2e8f1a9b30
+Revises:
+Create Date: 2026-10-16 10:05:00.000000
+
+Databases built by seed.py before alembic was wired up have the original schema;
+this is the first revision on top of it.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c2e8f1a9b30'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('rebalance_suggestions', sa.Column('binding_constraint', sa.Text(), nullable=True))
+    op.add_column('rebalance_suggestions', sa.Column('post_trade_weight', sa.Numeric(6, 2), nullable=True))
+    op.add_column('rebalance_suggestions', sa.Column('post_trade_drift', sa.Numeric(6, 2), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('rebalance_suggestions', 'post_trade_drift')
+    op.drop_column('rebalance_suggestions', 'post_trade_weight')
+    op.drop_column('rebalance_suggestions', 'binding_constraint')
@@ -0,0 +1,38 @@
+"""audit log jsonb payload and keyset indexes
+
+Revision ID: 8d4b1e6c2f71
+Revises: 5c2e8f1a9b30
+Create Date: 2026-10-16 10:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d4b1e6c2f71'
+down_revision: Union[str, Sequence[str], None] = '5c2e8f1a9b30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("ALTER TABLE audit_log ALTER COLUMN payload TYPE jsonb USING payload::jsonb")
+    # Payloads used to be written json.dumps'd, so older rows hold a JSON string of the
+    # object rather than the object itself
+    op.execute(
+        "UPDATE audit_log SET payload = (payload #>> '{}')::jsonb "
+        "WHERE jsonb_typeof(payload) = 'string' AND payload #>> '{}' ~ '^\\s*[\\[{]'"
+    )
+    op.create_index('ix_audit_log_created_at_id', 'audit_log', ['created_at', 'id'])
+    op.create_index('ix_audit_log_action_type_created_at_id', 'audit_log', ['action_type', 'created_at', 'id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_audit_log_action_type_created_at_id', table_name='audit_log')
+    op.drop_index('ix_audit_log_created_at_id', table_name='audit_log')
+    op.execute("ALTER TABLE audit_log ALTER COLUMN payload TYPE json USING payload::json")
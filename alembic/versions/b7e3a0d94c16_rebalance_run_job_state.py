@@ -0,0 +1,47 @@
+"""rebalance run job state
+
+Revision ID: b7e3a0d94c16
+Revises: 8d4b1e6c2f71
+Create Date: 2026-10-16 10:35:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e3a0d94c16'
+down_revision: Union[str, Sequence[str], None] = '8d4b1e6c2f71'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing runs were all written synchronously, so the defaults mark them complete
+    op.add_column('rebalance_runs', sa.Column('status', sa.Text(), nullable=False, server_default='completed'))
+    op.add_column('rebalance_runs', sa.Column('progress', sa.Integer(), nullable=False, server_default='100'))
+    op.add_column('rebalance_runs', sa.Column('stage', sa.Text(), nullable=True))
+    op.add_column('rebalance_runs', sa.Column('error', sa.Text(), nullable=True))
+    op.add_column('rebalance_runs', sa.Column('engine', sa.Text(), nullable=True))
+    op.add_column('rebalance_runs', sa.Column('drift_before', sa.Numeric(8, 2), nullable=True))
+    op.add_column('rebalance_runs', sa.Column('drift_after_est', sa.Numeric(8, 2), nullable=True))
+    op.create_check_constraint(
+        'check_run_status_valid',
+        'rebalance_runs',
+        "status IN ('queued', 'running', 'completed', 'failed')",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('check_run_status_valid', 'rebalance_runs', type_='check')
+    op.drop_column('rebalance_runs', 'drift_after_est')
+    op.drop_column('rebalance_runs', 'drift_before')
+    op.drop_column('rebalance_runs', 'engine')
+    op.drop_column('rebalance_runs', 'error')
+    op.drop_column('rebalance_runs', 'stage')
+    op.drop_column('rebalance_runs', 'progress')
+    op.drop_column('rebalance_runs', 'status')
@@ -0,0 +1,32 @@
+"""stock price watermark
+
+Revision ID: e41f7a2c8d05
+Revises: b7e3a0d94c16
+Create Date: 2026-10-16 11:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e41f7a2c8d05'
+down_revision: Union[str, Sequence[str], None] = 'b7e3a0d94c16'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('stock_prices', sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=True))
+    op.create_index('ix_stock_prices_date', 'stock_prices', ['date'])
+    op.create_index('ix_stock_prices_updated_at', 'stock_prices', ['updated_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_stock_prices_updated_at', table_name='stock_prices')
+    op.drop_index('ix_stock_prices_date', table_name='stock_prices')
+    op.drop_column('stock_prices', 'updated_at')
@@ -0,0 +1,67 @@
+"""price warehouse and score snapshot tables
+
+Revision ID: f29c6b5e1a83
+Revises: e41f7a2c8d05
+Create Date: 2026-10-16 14:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f29c6b5e1a83'
+down_revision: Union[str, Sequence[str], None] = 'e41f7a2c8d05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # ingest_prices.py, score_stocks.py and backtest_scores.py used to create these with
+    # create_all, so a database they ran against may already have them
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'index_prices' not in existing:
+        op.create_table(
+            'index_prices',
+            sa.Column('ticker', sa.Text(), nullable=False),
+            sa.Column('date', sa.Date(), nullable=False),
+            sa.Column('close_price', sa.Numeric(12, 2), nullable=True),
+            sa.PrimaryKeyConstraint('ticker', 'date'),
+        )
+
+    if 'stock_scores' not in existing:
+        op.create_table(
+            'stock_scores',
+            sa.Column('ticker', sa.Text(), nullable=False),
+            sa.Column('date', sa.Date(), nullable=False),
+            sa.Column('sector_id', sa.Integer(), nullable=True),
+            sa.Column('composite_score', sa.Numeric(5, 2), nullable=False),
+            sa.Column('rank', sa.Integer(), nullable=False),
+            sa.Column('total', sa.Integer(), nullable=False),
+            sa.Column('percentile', sa.Numeric(5, 2), nullable=False),
+            sa.Column('leader_laggard', sa.Text(), nullable=True),
+            sa.Column('rel_strength_rank_pct', sa.Numeric(5, 2), nullable=True),
+            sa.Column('revenue_growth_rank_pct', sa.Numeric(5, 2), nullable=True),
+            sa.Column('roe_rank_pct', sa.Numeric(5, 2), nullable=True),
+            sa.Column('roic_rank_pct', sa.Numeric(5, 2), nullable=True),
+            sa.ForeignKeyConstraint(['ticker'], ['stocks.ticker']),
+            sa.ForeignKeyConstraint(['sector_id'], ['sectors.id']),
+            sa.PrimaryKeyConstraint('ticker', 'date'),
+            sa.CheckConstraint("leader_laggard IN ('Leader', 'Neutral', 'Laggard')", name='check_leader_laggard_valid'),
+        )
+        op.create_index(
+            'ix_stock_scores_date_sector_score',
+            'stock_scores',
+            ['date', 'sector_id', sa.text('composite_score DESC')],
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_stock_scores_date_sector_score', table_name='stock_scores')
+    op.drop_table('stock_scores')
+    op.drop_table('index_prices')
@@ -1,3 +1,4 @@
+import os
 from typing import Generator
 from fastapi import Depends
 from sqlalchemy.orm import Session
@@ -10,6 +11,11 @@ from app.providers.seed.fundamentals import SeedFundamentalsDataProvider
 
 from app.providers.yfinance.sector import YfinanceSectorDataProvider
 from app.providers.yfinance.stock import YfinanceStockDataProvider
+from app.providers.warehouse.sector import WarehouseSectorDataProvider
+from app.providers.warehouse.stock import WarehouseStockDataProvider
+
+# "yfinance" downloads live bars; "warehouse" serves from the tables filled by ingest_prices.py
+MARKET_DATA_SOURCE = os.getenv("MARKET_DATA_SOURCE", "yfinance")
 
 def get_db() -> Generator:
     try:
@@ -19,9 +25,13 @@ def get_db() -> Generator:
         db.close()
 
 def get_sector_provider(db: Session = Depends(get_db)) -> SectorDataProvider:
+    if MARKET_DATA_SOURCE == "warehouse":
+        return WarehouseSectorDataProvider(db)
     return YfinanceSectorDataProvider(db)
 
 def get_stock_provider(db: Session = Depends(get_db)) -> StockDataProvider:
+    if MARKET_DATA_SOURCE == "warehouse":
+        return WarehouseStockDataProvider(db)
     return YfinanceStockDataProvider(db)
 
 def get_portfolio_provider(db: Session = Depends(get_db)) -> PortfolioDataProvider:
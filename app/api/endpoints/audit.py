@@ -1,14 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from typing import List, Dict, Any
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
 from app.api import deps
+from app.services.audit import audit_sink
+from app.services.portfolio_cache import portfolio_cache
+from app.db.session import session_scope
 from app.models.models import Constraint, AuditLog
+from app.repositories.bulk import bulk_update_from_values
 from pydantic import BaseModel
 from datetime import datetime
+import base64
+import csv
+import io
 import json
 
 router = APIRouter()
 
+# Rows fetched per server-side cursor round trip (and per streamed chunk) during export
+EXPORT_BATCH_SIZE = 1000
+
 class ConstraintUpdate(BaseModel):
     key: str
     value: float
@@ -18,7 +30,7 @@ class AuditLogResponse(BaseModel):
     created_at: datetime
     action_type: str
     description: str
-    payload: Dict[str, Any] = {}
+    payload: Any = {}
 
 class ConstraintResponse(BaseModel):
     key: str
@@ -35,55 +47,141 @@ def update_constraints(
     updates: List[ConstraintUpdate],
     db: Session = Depends(deps.get_db)
 ):
-    for update in updates:
-        c = db.query(Constraint).filter(Constraint.key == update.key).first()
-        if c:
-            c.value = update.value
+    requested = {u.key: u.value for u in updates}
+    updated = bulk_update_from_values(db, Constraint, Constraint.key, Constraint.value, requested)
+    unknown = sorted(set(requested) - set(updated))
             
-    db.add(AuditLog(
+    db.commit()
+    portfolio_cache.invalidate()
+    audit_sink.record(
         action_type="CONSTRAINT_UPDATED",
         description=f"Updated {len(updates)} constraints",
-        payload=json.dumps([u.dict() for u in updates])
-    ))
-    db.commit()
-    return {"status": "success"}
+        payload=[u.dict() for u in updates]
+    )
+    return {"status": "success", "updated": len(updated), "unknown": unknown}
+
+def _encode_cursor(log: AuditLog) -> str:
+    raw = f"{log.created_at.isoformat()}|{log.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        created_at, log_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(log_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 @router.get("/audit-log", response_model=List[AuditLogResponse])
 def get_audit_log(
+    response: Response,
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Value of X-Next-Cursor from the previous page; takes precedence over page"),
+    action_type: Optional[str] = None,
+    start: Optional[datetime] = Query(None, description="Only entries created at or after this time"),
+    end: Optional[datetime] = Query(None, description="Only entries created before this time"),
     db: Session = Depends(deps.get_db)
 ):
-    skip = (page - 1) * page_size
-    logs = db.query(AuditLog).order_by(AuditLog.created_at.desc()).offset(skip).limit(page_size).all()
-    
-    # Parse payload if it's string (since DB stores JSONB but SQLAlchemy might return dict if dialect supports it, or str if sqlite)
-    # Our model definition said JSON, which maps to JSON in PG, but Python object in SQLAlchemy logic usually.
-    # However, I stored it as `json.dumps` string in some places?
-    # `payload` column is `JSON`. SQLAlchemy with PG supports dict directly.
-    # But `seed.py` (which I haven't written yet) or `rebalance.py` wrote to it?
-    # In `rebalance.py` I used `json.dumps`.
-    # `JSON` type implies it handles serialization if using `psycopg2`.
-    # Pydantic expects dict.
-    
-    results = []
-    for l in logs:
-        # If l.payload is string (sqlite), parse it. If dict (pg), use it.
-        pl = l.payload
-        if isinstance(pl, str):
-            try:
-                pl = json.loads(pl)
-            except:
-                pl = {}
-        if pl is None:
+    query = _filter_audit_log(db.query(AuditLog), action_type, start, end)
+    query = query.order_by(AuditLog.created_at.desc(), AuditLog.id.desc())
+    if cursor:
+        # Keyset: seek past the last row of the previous page instead of OFFSET
+        created_at, log_id = _decode_cursor(cursor)
+        query = query.filter(tuple_(AuditLog.created_at, AuditLog.id) < tuple_(created_at, log_id))
+    else:
+        query = query.offset((page - 1) * page_size)
+
+    logs = query.limit(page_size).all()
+    if len(logs) == page_size:
+        response.headers["X-Next-Cursor"] = _encode_cursor(logs[-1])
+
+    return [_audit_log_dict(l) for l in logs]
+
+@router.get("/audit-log/export")
+def export_audit_log(
+    format: str = Query("ndjson", regex="^(ndjson|csv)$"),
+    action_type: Optional[str] = None,
+    start: Optional[datetime] = Query(None, description="Only entries created at or after this time"),
+    end: Optional[datetime] = Query(None, description="Only entries created before this time"),
+):
+    """
+    Stream the full (optionally filtered) audit log, oldest first, as NDJSON or CSV.
+    Rows are read through a server-side cursor so memory stays flat regardless of table size.
+    """
+    rows = _stream_audit_log(action_type, start, end)
+    if format == "csv":
+        body, media_type = _csv_chunks(rows), "text/csv"
+    else:
+        body, media_type = _ndjson_chunks(rows), "application/x-ndjson"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="audit_log.{format}"'},
+    )
+
+def _filter_audit_log(query, action_type: Optional[str], start: Optional[datetime], end: Optional[datetime]):
+    if action_type:
+        query = query.filter(AuditLog.action_type == action_type)
+    if start:
+        query = query.filter(AuditLog.created_at >= start)
+    if end:
+        query = query.filter(AuditLog.created_at < end)
+    return query
+
+def _audit_log_dict(l: AuditLog) -> Dict[str, Any]:
+    # Rows written before payloads were stored natively hold a JSON-encoded string
+    pl = l.payload
+    if isinstance(pl, str):
+        try:
+            pl = json.loads(pl)
+        except ValueError:
             pl = {}
-            
-        results.append({
-            "id": l.id,
-            "created_at": l.created_at,
-            "action_type": l.action_type,
-            "description": l.description,
-            "payload": pl
-        })
-        
-    return results
+    if pl is None:
+        pl = {}
+
+    return {
+        "id": l.id,
+        "created_at": l.created_at,
+        "action_type": l.action_type,
+        "description": l.description,
+        "payload": pl
+    }
+
+def _stream_audit_log(action_type: Optional[str], start: Optional[datetime], end: Optional[datetime]) -> Iterator[Dict[str, Any]]:
+    # Runs while the response streams, after the request-scoped session is gone
+    with session_scope() as db:
+        query = _filter_audit_log(db.query(AuditLog), action_type, start, end)
+        query = query.order_by(AuditLog.created_at.asc(), AuditLog.id.asc()).yield_per(EXPORT_BATCH_SIZE)
+        for l in query:
+            yield _audit_log_dict(l)
+
+def _ndjson_chunks(rows: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(row, default=str))
+        if len(lines) >= EXPORT_BATCH_SIZE:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+def _csv_chunks(rows: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["id", "created_at", "action_type", "description", "payload"])
+    count = 0
+    for row in rows:
+        writer.writerow([
+            row["id"],
+            row["created_at"].isoformat() if row["created_at"] else "",
+            row["action_type"],
+            row["description"],
+            json.dumps(row["payload"], default=str),
+        ])
+        count += 1
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    yield buffer.getvalue()
@@ -1,23 +1,57 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
 from typing import List, Dict, Any
 from sqlalchemy.orm import Session
 from app.api import deps
+from app.services.audit import audit_sink
+from app.services.portfolio_cache import portfolio_cache
 from app.providers.base import PortfolioDataProvider, SectorDataProvider, StockDataProvider
 from app.schemas.portfolio import PortfolioResponse, StockTargetUpdate, SectorTargetUpdate, PortfolioHoldingResponse, SectorExposure, Violation
-from app.models.models import Constraint, PortfolioTarget, PortfolioHolding, AuditLog
+from app.models.models import Constraint, PortfolioTarget, PortfolioHolding
+from app.repositories.bulk import bulk_update_from_values
+from app.repositories.prices import get_price_watermark
+import hashlib
 import json
 
 router = APIRouter()
 
 @router.get("", response_model=PortfolioResponse)
 def get_portfolio(
+    request: Request,
+    response: Response,
     portfolio_provider: PortfolioDataProvider = Depends(deps.get_portfolio_provider),
     sector_provider: SectorDataProvider = Depends(deps.get_sector_provider),
     db: Session = Depends(deps.get_db)
 ):
     """
     Returns holdings, sector exposure, drift, and any constraint violations.
+    Served from the portfolio snapshot cache until a write or new or re-fetched prices invalidate it.
     """
+    watermark = get_price_watermark(db)
+    snapshot = portfolio_cache.get(watermark)
+    if snapshot is None:
+        version = portfolio_cache.version
+        portfolio = _build_portfolio(portfolio_provider, sector_provider, db)
+        snapshot = portfolio_cache.put(version, watermark, portfolio, _portfolio_etag(portfolio))
+
+    if request.headers.get("if-none-match") == snapshot.etag:
+        return Response(status_code=304, headers={"ETag": snapshot.etag})
+    response.headers["ETag"] = snapshot.etag
+    return snapshot.value
+
+def _portfolio_etag(portfolio: PortfolioResponse) -> str:
+    """
+    Strong ETag from the serialized view, so every worker (and a restarted one) gives
+    the same tag for the same portfolio.
+    """
+    body = json.dumps(jsonable_encoder(portfolio), sort_keys=True, separators=(",", ":"))
+    return f'"{hashlib.sha256(body.encode()).hexdigest()[:32]}"'
+
+def _build_portfolio(
+    portfolio_provider: PortfolioDataProvider,
+    sector_provider: SectorDataProvider,
+    db: Session
+) -> PortfolioResponse:
     holdings_data = portfolio_provider.get_holdings() # List of dicts
     # holdings_data has: ticker, name, sector, sector_id, quantity, avg_cost, current_price, target_weight, market_cap_cr
     
@@ -87,8 +121,7 @@ def get_portfolio(
     sector_targets_map = portfolio_provider.get_targets() # {'1': 30.0, ...}
     
     # Also get all sectors names
-    all_sectors = sector_provider.get_all_sectors(period='3m') # just to get names/ids
-    sector_info = {s['id']: s['name'] for s in all_sectors}
+    sector_info = {s['id']: s['name'] for s in sector_provider.get_sector_catalog()}
     
     sector_exposure_response = []
     
@@ -147,19 +180,19 @@ def update_stock_targets(
     """
     Update stock-level target weights.
     """
-    for update in updates:
-        holding = db.query(PortfolioHolding).filter(PortfolioHolding.ticker == update.ticker).first()
-        if holding:
-            holding.target_weight = update.target_weight
+    requested = {u.ticker: u.target_weight for u in updates}
+    updated = bulk_update_from_values(db, PortfolioHolding, PortfolioHolding.ticker, PortfolioHolding.target_weight, requested)
+    unknown = sorted(set(requested) - set(updated))
             
-    # Log audit
-    db.add(AuditLog(
+    db.commit()
+    portfolio_cache.invalidate()
+    # Log audit (written behind, after the change is committed)
+    audit_sink.record(
         action_type="TARGET_UPDATED",
         description=f"Updated targets for {len(updates)} stocks",
-        payload=json.dumps([u.dict() for u in updates])
-    ))
-    db.commit()
-    return {"status": "success"}
+        payload=[u.dict() for u in updates]
+    )
+    return {"status": "success", "updated": len(updated), "unknown": unknown}
 
 @router.put("/sector-targets")
 def update_sector_targets(
@@ -169,16 +202,16 @@ def update_sector_targets(
     """
     Update sector-level target weights.
     """
-    for update in updates:
-        target = db.query(PortfolioTarget).filter(PortfolioTarget.sector_id == update.sector_id).first()
-        if target:
-            target.target_weight = update.target_weight
+    requested = {u.sector_id: u.target_weight for u in updates}
+    updated = bulk_update_from_values(db, PortfolioTarget, PortfolioTarget.sector_id, PortfolioTarget.target_weight, requested)
+    unknown = sorted(set(requested) - set(updated))
             
-    # Log audit
-    db.add(AuditLog(
+    db.commit()
+    portfolio_cache.invalidate()
+    # Log audit (written behind, after the change is committed)
+    audit_sink.record(
         action_type="SECTOR_TARGET_UPDATED",
         description=f"Updated targets for {len(updates)} sectors",
-        payload=json.dumps([u.dict() for u in updates])
-    ))
-    db.commit()
-    return {"status": "success"}
+        payload=[u.dict() for u in updates]
+    )
+    return {"status": "success", "updated": len(updated), "unknown": unknown}
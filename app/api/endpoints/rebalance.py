@@ -1,23 +1,40 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+from sqlalchemy import insert
+from sqlalchemy.orm import Session, joinedload
 from app.api import deps
+from app.services.audit import audit_sink
+from app.services.jobs import rebalance_jobs, JobQueueFull
+from app.services.portfolio_cache import portfolio_cache
+from app.db.session import session_scope
 from app.api.endpoints.portfolio import get_portfolio
 from app.providers.base import PortfolioDataProvider, SectorDataProvider, StockDataProvider
-from app.models.models import RebalanceRun, RebalanceSuggestion, Constraint, AuditLog, Stock, Sector
-from app.services import rebalance
-from app.schemas.rebalance import RebalanceRunResponse, SuggestionAction
-import json
+from app.models.models import RebalanceRun, RebalanceSuggestion, Constraint, Stock
+from app.services import rebalance, scoring, simulation
+from app.schemas.rebalance import RebalanceRunResponse, SuggestionAction, SimulationRequest, SimulationResponse
 from datetime import datetime
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-@router.post("/generate", response_model=RebalanceRunResponse)
-def generate_rebalance(
-    db: Session = Depends(deps.get_db),
-    portfolio_provider: PortfolioDataProvider = Depends(deps.get_portfolio_provider),
-    sector_provider: SectorDataProvider = Depends(deps.get_sector_provider),
-    stock_provider: StockDataProvider = Depends(deps.get_stock_provider)
-):
+# How often the job event stream re-reads the run row
+JOB_EVENT_POLL_SECONDS = 0.5
+
+def _load_rebalance_state(
+    db: Session,
+    portfolio_provider: PortfolioDataProvider,
+    sector_provider: SectorDataProvider,
+    stock_provider: StockDataProvider
+) -> Dict[str, Any]:
+    """
+    Portfolio, market and constraint state an engine run needs, fetched once.
+    """
     # 1. Get current state (reuse portfolio endpoint logic mostly)
     # Ideally code reuse, but for now calling the provider directly
     holdings = portfolio_provider.get_holdings()
@@ -27,7 +44,12 @@ def generate_rebalance(
     # We can call the get_portfolio function if we structure it as a service or just redo logic.
     # Redo logic for clarity and decoupling from API response shape.
     
-    total_value_cr = sum(h['current_value_cr'] for h in map(lambda x: {**x, 'current_value_cr': (x['quantity'] * x['current_price']) / 10000000.0}, holdings))
+    # Both engines size trades from each holding's value and portfolio weight
+    for h in holdings:
+        h['current_value_cr'] = (h['quantity'] * h['current_price']) / 10000000.0
+    total_value_cr = sum(h['current_value_cr'] for h in holdings)
+    for h in holdings:
+        h['portfolio_weight'] = (h['current_value_cr'] / total_value_cr * 100) if total_value_cr > 0 else 0.0
     
     sector_targets = portfolio_provider.get_targets()
     sector_values = {}
@@ -37,7 +59,8 @@ def generate_rebalance(
         sector_values[sid] = sector_values.get(sid, 0) + val
         
     sector_exposure = []
-    all_sectors = sector_provider.get_all_sectors()
+    # Names and ids only: the catalog never touches market data
+    all_sectors = sector_provider.get_sector_catalog()
     sector_names = {s['id']: s['name'] for s in all_sectors}
     
     drift_before = 0.0
@@ -57,20 +80,61 @@ def generate_rebalance(
         })
 
     # 2. Get Stocks (Candidate universe)
-    # We need all stocks from all sectors? Or just relevant ones?
     # Service needs 'stocks' list with scores.
-    # Iteratively fetch for all sectors.
-    all_stocks = []
-    for sec in all_sectors:
-        sec_stocks = stock_provider.get_stocks_for_sector(sec['id'])
-        all_stocks.extend(sec_stocks)
+    # One universe-level fetch instead of one download per sector.
+    all_stocks = stock_provider.get_stocks_for_sectors([sec['id'] for sec in all_sectors])
+    # Composite score / Leader-Laggard for the whole universe in one vectorized pass
+    scoring.apply_stock_scores(all_stocks)
         
     # 3. Get Constraints
     db_constraints = db.query(Constraint).all()
     constraints_dict = {c.key: float(c.value) for c in db_constraints}
     
+    return {
+        "holdings": holdings,
+        "sector_exposure": sector_exposure,
+        "stocks": all_stocks,
+        "constraints": constraints_dict,
+        "total_value_cr": total_value_cr,
+        "drift_before": drift_before,
+        "sector_names": sector_names,
+    }
+
+@router.post("/generate", response_model=RebalanceRunResponse)
+def generate_rebalance(
+    db: Session = Depends(deps.get_db),
+    portfolio_provider: PortfolioDataProvider = Depends(deps.get_portfolio_provider),
+    sector_provider: SectorDataProvider = Depends(deps.get_sector_provider),
+    stock_provider: StockDataProvider = Depends(deps.get_stock_provider),
+    engine: str = Query("greedy", regex="^(greedy|optimize)$")
+):
+    state = _load_rebalance_state(db, portfolio_provider, sector_provider, stock_provider)
+    run = RebalanceRun(constraints=state["constraints"], engine=engine)
+    db.add(run)
+    db.flush() # get ID
+    return _execute_rebalance(db, run, state, engine)
+
+def _execute_rebalance(
+    db: Session,
+    run: RebalanceRun,
+    state: Dict[str, Any],
+    engine: str,
+    progress: Optional[Callable[[int, str], None]] = None
+) -> Dict[str, Any]:
+    """
+    Run the engine on loaded state, store the suggestions on run and mark it completed.
+    Returns the RebalanceRunResponse payload.
+    """
+    holdings = state["holdings"]
+    sector_exposure = state["sector_exposure"]
+    all_stocks = state["stocks"]
+    constraints_dict = state["constraints"]
+    total_value_cr = state["total_value_cr"]
+    drift_before = state["drift_before"]
+    sector_names = state["sector_names"]
+
     # 4. Run Engine
-    suggestions_data = rebalance.generate_suggestions(
+    suggestions_data = rebalance.ENGINES[engine](
         holdings=holdings,
         sector_exposure=sector_exposure,
         stocks=all_stocks,
@@ -78,54 +142,47 @@ def generate_rebalance(
     )
     
     # 5. Calculate drift after (est)
-    # Sum of post_trade_drift for affected sectors?
-    # Simple approx:
-    drift_after = 0.0 # To be calculated more accurately if time permits, or sum from suggestions?
-    # The service returns 'post_trade_drift' for affected sectors.
-    # For unaffected sectors, drift is same.
-    affected_sectors = {s['sector_id'] for s in suggestions_data} 
-    # Wait, suggestions dont have sector_id directly? Rebalance service returns 'post_trade_drift' in suggestion.
-    # But that's per suggestion.
-    # Construct a map of latest drift per sector?
-    # Rebalance service logic does sequential updates.
-    # The last suggestion for a sector has the final drift? Not necessarily if interleaved.
-    # Actually rebalance service tracks 'sim_sector_weights'.
-    # We can't easy get the final drift from the list output unless we trust the last entry for that sector.
-    # Let's approximate or just take the sum of drifts from suggestions + unchanged.
-    
-    # Improved: rebalance service could return summary. But it returns list.
-    # Let's leave drift_after calculation roughly or update service.
-    # For v1, I'll calculate it from suggestions if possible, or just 0.
+    drift_after = rebalance.estimate_drift_after(sector_exposure, suggestions_data, all_stocks, total_value_cr)
     
     # 6. Save to DB
-    run = RebalanceRun(constraints=constraints_dict)
-    db.add(run)
-    db.flush() # get ID
+    if progress:
+        progress(80, "Saving suggestions")
     
-    db_suggestions = []
-    for s in suggestions_data:
-        db_s = RebalanceSuggestion(
-            run_id=run.id,
-            action=s['action'],
-            ticker=s['ticker'],
-            quantity=s['quantity'],
-            est_value=s['est_value_cr'],
-            rationale=s['rationale']
-        )
-        db.add(db_s)
-        db_suggestions.append(db_s)
-        
+    # Bulk insert with RETURNING so IDs come back in the same statement, in input order
+    suggestion_rows = [
+        {
+            "run_id": run.id,
+            "action": s['action'],
+            "ticker": s['ticker'],
+            "quantity": s['quantity'],
+            "est_value": s['est_value_cr'],
+            "rationale": s['rationale'],
+            "binding_constraint": s.get('binding_constraint'),
+            "post_trade_weight": s.get('post_trade_weight'),
+            "post_trade_drift": s.get('post_trade_drift'),
+        }
+        for s in suggestions_data
+    ]
+    suggestion_ids = []
+    if suggestion_rows:
+        suggestion_ids = db.execute(
+            insert(RebalanceSuggestion).returning(RebalanceSuggestion.id, sort_by_parameter_order=True),
+            suggestion_rows
+        ).scalars().all()
+    
+    run.constraints = constraints_dict
+    run.drift_before = round(drift_before, 2)
+    run.drift_after_est = round(drift_after, 2)
+    run.status = 'completed'
+    run.progress = 100
+    run.stage = None
     db.commit()
     
-    # Refresh to get IDs
-    for s in db_suggestions:
-        db.refresh(s)
-        
     # Build Response
     response_suggestions = []
     
     # Need to map back to response schema
-    # s is dict from service, db_s is model.
+    # s is dict from service, suggestion_ids[i] is its row ID.
     # We need name/sector etc which are not in DB model (only relations, but relations might not be eager loaded yet).
     # We have 'all_stocks' map.
     stock_map = {st['ticker']: st for st in all_stocks}
@@ -133,7 +190,7 @@ def generate_rebalance(
     for i, s in enumerate(suggestions_data):
         st = stock_map.get(s['ticker'], {})
         response_suggestions.append({
-            "id": db_suggestions[i].id,
+            "id": suggestion_ids[i],
             "action": s['action'],
             "ticker": s['ticker'],
             "name": st.get('name', ''),
@@ -154,11 +211,149 @@ def generate_rebalance(
         "summary": {
             "total_suggestions": len(suggestions_data),
             "drift_before": round(drift_before, 2),
-            "drift_after_est": 0.0 # Placeholder
+            "drift_after_est": round(drift_after, 2)
         },
         "suggestions": response_suggestions
     }
 
+@router.post("/simulate", response_model=SimulationResponse)
+def simulate_rebalance(
+    sweep: SimulationRequest,
+    db: Session = Depends(deps.get_db),
+    portfolio_provider: PortfolioDataProvider = Depends(deps.get_portfolio_provider),
+    sector_provider: SectorDataProvider = Depends(deps.get_sector_provider),
+    stock_provider: StockDataProvider = Depends(deps.get_stock_provider)
+):
+    """
+    What-if sweep: run the engine for every combination of the given constraint values
+    against one snapshot of portfolio and market state. Nothing is persisted.
+    """
+    if sweep.engine not in rebalance.ENGINES:
+        raise HTTPException(status_code=400, detail=f"Unknown engine '{sweep.engine}'")
+
+    axes = {
+        "max_stock_weight": sweep.max_stock_weight,
+        "max_sector_cap": sweep.max_sector_cap,
+        "max_trades_per_run": sweep.max_trades_per_run,
+    }
+    # Reject oversized sweeps before fetching any portfolio or market data
+    points = simulation.grid_size(axes)
+    if points > simulation.MAX_SIMULATION_POINTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Sweep has {points} combinations; the limit is {simulation.MAX_SIMULATION_POINTS}"
+        )
+
+    state = _load_rebalance_state(db, portfolio_provider, sector_provider, stock_provider)
+    grid = simulation.constraint_grid(state["constraints"], axes)
+
+    return {
+        "drift_before": round(state["drift_before"], 2),
+        "total_value_cr": round(state["total_value_cr"], 2),
+        "results": simulation.simulate(state, grid, sweep.engine),
+    }
+
+@router.post("/jobs", status_code=202)
+def create_rebalance_job(
+    engine: str = Query("greedy", regex="^(greedy|optimize)$"),
+    db: Session = Depends(deps.get_db)
+):
+    """
+    Queue a rebalance run and return its id at once. Follow it with GET /jobs/{run_id}
+    or the SSE stream at /jobs/{run_id}/events, then fetch /runs/{run_id}.
+    """
+    run = RebalanceRun(constraints={}, engine=engine, status='queued', progress=0, stage="Queued")
+    db.add(run)
+    db.commit()
+
+    try:
+        rebalance_jobs.submit(_run_rebalance_job, run.id, engine)
+    except JobQueueFull as e:
+        run.status = 'failed'
+        run.error = str(e)
+        db.commit()
+        raise HTTPException(status_code=503, detail="Too many rebalance jobs pending; retry shortly")
+
+    return _job_status(run)
+
+@router.get("/jobs/{run_id}")
+def get_rebalance_job(run_id: int, db: Session = Depends(deps.get_db)):
+    run = db.get(RebalanceRun, run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Rebalance job not found")
+    return _job_status(run)
+
+@router.get("/jobs/{run_id}/events")
+def stream_rebalance_job(run_id: int, db: Session = Depends(deps.get_db)):
+    """
+    Server-sent events: one "progress" event per status/progress change, ending after
+    the run completes or fails.
+    """
+    if not db.get(RebalanceRun, run_id):
+        raise HTTPException(status_code=404, detail="Rebalance job not found")
+    return StreamingResponse(
+        _job_events(run_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def _job_status(run: RebalanceRun) -> Dict[str, Any]:
+    return {
+        "run_id": run.id,
+        "status": run.status,
+        "progress": run.progress,
+        "stage": run.stage,
+        "error": run.error,
+    }
+
+def _read_job_status(run_id: int) -> Optional[Dict[str, Any]]:
+    # A fresh session per poll: sees the worker's latest commit and never spans threads
+    with session_scope() as db:
+        run = db.get(RebalanceRun, run_id)
+        return _job_status(run) if run is not None else None
+
+async def _job_events(run_id: int) -> AsyncIterator[str]:
+    # Async so a subscriber only holds a threadpool thread for each row read, not the whole job
+    last = None
+    while True:
+        status = await run_in_threadpool(_read_job_status, run_id)
+        if status is None:
+            return
+        if status != last:
+            yield f"event: progress\ndata: {json.dumps(status)}\n\n"
+            last = status
+        if status["status"] in ('completed', 'failed'):
+            return
+        await asyncio.sleep(JOB_EVENT_POLL_SECONDS)
+
+def _run_rebalance_job(run_id: int, engine: str) -> None:
+    with session_scope() as db:
+        try:
+            run = db.get(RebalanceRun, run_id)
+
+            def progress(percent: int, stage: str) -> None:
+                run.progress = percent
+                run.stage = stage
+                db.commit()
+
+            run.status = 'running'
+            progress(10, "Loading portfolio and market data")
+            state = _load_rebalance_state(
+                db,
+                deps.get_portfolio_provider(db),
+                deps.get_sector_provider(db),
+                deps.get_stock_provider(db),
+            )
+            progress(60, "Generating suggestions")
+            _execute_rebalance(db, run, state, engine, progress)
+        except Exception as e:
+            logger.exception(f"Rebalance job {run_id} failed")
+            db.rollback()
+            run = db.get(RebalanceRun, run_id)
+            if run is not None:
+                run.status = 'failed'
+                run.error = str(e)
+
 @router.post("/{run_id}/approve")
 def approve_suggestion(
     run_id: int,
@@ -178,13 +373,15 @@ def approve_suggestion(
         
     suggestion.status = 'approved'
     suggestion.approved_at = datetime.now()
+    description = f"Approved {suggestion.action} {suggestion.ticker}"
     
-    db.add(AuditLog(
-        action_type="SUGGESTION_APPROVED",
-        description=f"Approved {suggestion.action} {suggestion.ticker}",
-        payload=json.dumps({"suggestion_id": suggestion.id})
-    ))
     db.commit()
+    portfolio_cache.invalidate()
+    audit_sink.record(
+        action_type="SUGGESTION_APPROVED",
+        description=description,
+        payload={"suggestion_id": action.suggestion_id}
+    )
     return {"status": "success"}
 
 @router.post("/{run_id}/lock")
@@ -205,48 +402,51 @@ def lock_suggestion(
         raise HTTPException(status_code=404, detail="Suggestion not found")
         
     suggestion.status = 'locked'
+    description = f"Locked {suggestion.action} {suggestion.ticker}"
     
-    db.add(AuditLog(
-        action_type="SUGGESTION_LOCKED",
-        description=f"Locked {suggestion.action} {suggestion.ticker}",
-        payload=json.dumps({"suggestion_id": suggestion.id})
-    ))
     db.commit()
+    portfolio_cache.invalidate()
+    audit_sink.record(
+        action_type="SUGGESTION_LOCKED",
+        description=description,
+        payload={"suggestion_id": action.suggestion_id}
+    )
     return {"status": "success"}
 
 @router.get("/latest", response_model=RebalanceRunResponse)
-def get_latest_run(
-    db: Session = Depends(deps.get_db),
-    sector_provider: SectorDataProvider = Depends(deps.get_sector_provider),
-    stock_provider: StockDataProvider = Depends(deps.get_stock_provider)
-):
-    run = db.query(RebalanceRun).order_by(RebalanceRun.created_at.desc()).first()
+def get_latest_run(db: Session = Depends(deps.get_db)):
+    run = (
+        db.query(RebalanceRun)
+        .filter(RebalanceRun.status == 'completed')
+        .order_by(RebalanceRun.created_at.desc())
+        .first()
+    )
     if not run:
         raise HTTPException(status_code=404, detail="No rebalance runs found")
-        
-    # Hydrate suggestions
-    suggestions = db.query(RebalanceSuggestion).filter(RebalanceSuggestion.run_id == run.id).all()
-    
-    # To get names/sectors, we might need to join or fetch.
-    # ORM relationships help. Suggestion has 'stock'.
-    # But stock.sector might be lazy loaded.
+    return _run_response(db, run)
+
+@router.get("/runs/{run_id}", response_model=RebalanceRunResponse)
+def get_run(run_id: int, db: Session = Depends(deps.get_db)):
+    run = db.get(RebalanceRun, run_id)
+    if not run or run.status != 'completed':
+        raise HTTPException(status_code=404, detail="Completed rebalance run not found")
+    return _run_response(db, run)
+
+def _run_response(db: Session, run: RebalanceRun) -> Dict[str, Any]:
+    # Hydrate suggestions with stock and sector in one joined query
+    suggestions = (
+        db.query(RebalanceSuggestion)
+        .options(joinedload(RebalanceSuggestion.stock).joinedload(Stock.sector))
+        .filter(RebalanceSuggestion.run_id == run.id)
+        .order_by(RebalanceSuggestion.id)
+        .all()
+    )
     
     response_suggestions = []
     for s in suggestions:
-        # Assuming db relationship is populated or we load it
-        # stock = s.stock (lazy load)
-        # sector = stock.sector
-        # Fallback to providers if not
-        
-        # We need sector name.
-        stock_obj = db.query(Stock).filter(Stock.ticker == s.ticker).first()
-        if stock_obj and stock_obj.sector_id:
-            sector_obj = db.query(Sector).filter(Sector.id == stock_obj.sector_id).first()
-            sector_name = sector_obj.name if sector_obj else ""
-            stock_name = stock_obj.name
-        else:
-            sector_name = ""
-            stock_name = ""
+        stock_obj = s.stock
+        stock_name = stock_obj.name if stock_obj else ""
+        sector_name = stock_obj.sector.name if stock_obj and stock_obj.sector else ""
             
         response_suggestions.append({
             "id": s.id,
@@ -257,9 +457,9 @@ def get_latest_run(
             "quantity": s.quantity,
             "est_value_cr": float(s.est_value) if s.est_value else 0.0,
             "rationale": s.rationale,
-            "binding_constraint": None, # Not stored in DB model currently? PRD schema doesn't have it. Schema has 'constraints' blob on Run.
-            "post_trade_weight": 0.0, # Not stored in DB?
-            "post_trade_drift": 0.0, # Not stored in DB?
+            "binding_constraint": s.binding_constraint,
+            "post_trade_weight": float(s.post_trade_weight) if s.post_trade_weight is not None else 0.0,
+            "post_trade_drift": float(s.post_trade_drift) if s.post_trade_drift is not None else 0.0,
             "status": s.status
         })
 
@@ -269,8 +469,8 @@ def get_latest_run(
         "constraints_used": run.constraints,
         "summary": {
             "total_suggestions": len(suggestions),
-            "drift_before": 0.0, # Can't easily reconstruct without re-running
-            "drift_after_est": 0.0
+            "drift_before": float(run.drift_before) if run.drift_before is not None else 0.0,
+            "drift_after_est": float(run.drift_after_est) if run.drift_after_est is not None else 0.0
         },
         "suggestions": response_suggestions
     }
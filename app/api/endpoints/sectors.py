@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List, Dict, Any
 from app.api import deps
 from app.providers.base import SectorDataProvider
+from app.services import scoring
 
 router = APIRouter()
 
@@ -38,4 +39,4 @@ def get_sector_stocks(
     Get all stocks in the sector with their latest scores and metrics.
     """
     stocks = provider.get_stocks_for_sector(sector_id)
-    return stocks
+    return scoring.apply_stock_scores(stocks)
@@ -1,19 +1,47 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import Dict, Any
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Dict, Any, Optional
+from sqlalchemy.orm import Session
 from app.api import deps
 from app.providers.base import StockDataProvider
+from app.repositories.scores import get_leaderboard
 
 router = APIRouter()
 
+@router.get("/leaderboard", response_model=List[Dict[str, Any]])
+def get_stock_leaderboard(
+    sector_id: Optional[int] = None,
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(deps.get_db)
+):
+    """
+    Top stocks by composite score from the latest score snapshot (see score_stocks.py).
+    """
+    return [
+        {
+            "ticker": row.ticker,
+            "name": row.stock.name if row.stock else "",
+            "sector_id": row.sector_id,
+            "date": row.date.isoformat(),
+            "composite_score": float(row.composite_score),
+            "rank": row.rank,
+            "total": row.total,
+            "percentile": float(row.percentile),
+            "leader_laggard": row.leader_laggard,
+        }
+        for row in get_leaderboard(db, sector_id=sector_id, limit=limit)
+    ]
+
 @router.get("/{ticker}", response_model=Dict[str, Any])
 def get_stock_details(
     ticker: str,
+    history_format: str = Query("records", regex="^(records|compact)$"),
     provider: StockDataProvider = Depends(deps.get_stock_provider)
 ):
     """
-    Get details for a single stock.
+    Get details for a single stock. history_format=compact returns price_history as
+    {"dates": [...], "close": [...]} instead of a list of {"date", "close"} objects.
     """
-    stock = provider.get_stock_details(ticker)
+    stock = provider.get_stock_details(ticker, compact_history=history_format == "compact")
     if not stock:
         raise HTTPException(status_code=404, detail="Stock not found")
     return stock
@@ -1,5 +1,7 @@
+from contextlib import contextmanager
+from typing import Iterator
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
 import os
 from dotenv import load_dotenv
 
@@ -24,3 +26,19 @@ def get_db():
         yield db
     finally:
         db.close()
+
+@contextmanager
+def session_scope() -> Iterator[Session]:
+    """
+    A session for work outside a request's lifetime (CLI passes, background jobs,
+    streamed responses): committed on success, rolled back on error, always closed.
+    """
+    db = SessionLocal()
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Numeric, Date, ForeignKey, DateTime, JSON, Text, BigInteger, UniqueConstraint, CheckConstraint
+from sqlalchemy import Column, Integer, String, Numeric, Date, ForeignKey, DateTime, JSON, Text, BigInteger, UniqueConstraint, CheckConstraint, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.session import Base
@@ -60,9 +61,48 @@ class StockPrice(Base):
     volume = Column(BigInteger)
     rel_strength_1m = Column(Numeric(6, 2))
     rel_strength_3m = Column(Numeric(6, 2))
+    # Set on insert and on every upsert, so a re-fetched bar moves it too
+    updated_at = Column(DateTime, server_default=func.now())
 
     stock = relationship("Stock", back_populates="prices")
 
+    __table_args__ = (
+        # max(date) / max(updated_at) price watermark for the portfolio snapshot cache
+        Index('ix_stock_prices_date', 'date'),
+        Index('ix_stock_prices_updated_at', 'updated_at'),
+    )
+
+class IndexPrice(Base):
+    __tablename__ = "index_prices"
+
+    ticker = Column(Text, primary_key=True)
+    date = Column(Date, nullable=False, primary_key=True)
+    close_price = Column(Numeric(12, 2))
+
+class StockScore(Base):
+    __tablename__ = "stock_scores"
+
+    ticker = Column(Text, ForeignKey("stocks.ticker"), primary_key=True)
+    date = Column(Date, nullable=False, primary_key=True)
+    sector_id = Column(Integer, ForeignKey("sectors.id"))
+    composite_score = Column(Numeric(5, 2), nullable=False)
+    rank = Column(Integer, nullable=False)
+    total = Column(Integer, nullable=False)
+    percentile = Column(Numeric(5, 2), nullable=False)
+    leader_laggard = Column(Text)
+    rel_strength_rank_pct = Column(Numeric(5, 2))
+    revenue_growth_rank_pct = Column(Numeric(5, 2))
+    roe_rank_pct = Column(Numeric(5, 2))
+    roic_rank_pct = Column(Numeric(5, 2))
+
+    stock = relationship("Stock")
+
+    __table_args__ = (
+        # Leaderboards: top-N of one snapshot date, per sector or across the universe
+        Index('ix_stock_scores_date_sector_score', date, sector_id, composite_score.desc()),
+        CheckConstraint("leader_laggard IN ('Leader', 'Neutral', 'Laggard')", name='check_leader_laggard_valid'),
+    )
+
 class PortfolioHolding(Base):
     __tablename__ = "portfolio_holdings"
 
@@ -88,9 +128,21 @@ class RebalanceRun(Base):
     id = Column(Integer, primary_key=True, index=True)
     created_at = Column(DateTime, server_default=func.now())
     constraints = Column(JSON, nullable=False)
+    # Synchronous runs are written complete; job runs move queued -> running -> completed/failed
+    status = Column(Text, nullable=False, server_default='completed')
+    progress = Column(Integer, nullable=False, server_default='100')
+    stage = Column(Text)
+    error = Column(Text)
+    engine = Column(Text)
+    drift_before = Column(Numeric(8, 2))
+    drift_after_est = Column(Numeric(8, 2))
 
     suggestions = relationship("RebalanceSuggestion", back_populates="run")
 
+    __table_args__ = (
+        CheckConstraint("status IN ('queued', 'running', 'completed', 'failed')", name='check_run_status_valid'),
+    )
+
 class RebalanceSuggestion(Base):
     __tablename__ = "rebalance_suggestions"
 
@@ -103,6 +155,9 @@ class RebalanceSuggestion(Base):
     rationale = Column(Text, nullable=False)
     status = Column(Text, server_default='pending')
     approved_at = Column(DateTime)
+    binding_constraint = Column(Text)
+    post_trade_weight = Column(Numeric(6, 2))
+    post_trade_drift = Column(Numeric(6, 2))
 
     run = relationship("RebalanceRun", back_populates="suggestions")
     stock = relationship("Stock")
@@ -126,4 +181,10 @@ class AuditLog(Base):
     created_at = Column(DateTime, server_default=func.now())
     action_type = Column(Text, nullable=False)
     description = Column(Text, nullable=False)
-    payload = Column(JSON)
+    payload = Column(JSON().with_variant(JSONB, "postgresql"))
+
+    __table_args__ = (
+        # Keyset pagination over (created_at, id), optionally narrowed by action_type
+        Index('ix_audit_log_created_at_id', 'created_at', 'id'),
+        Index('ix_audit_log_action_type_created_at_id', 'action_type', 'created_at', 'id'),
+    )
@@ -12,6 +12,11 @@ class SectorDataProvider(ABC):
         """Get details for a single sector including history."""
         pass
 
+    @abstractmethod
+    def get_sector_catalog(self) -> List[Dict]:
+        """Get id, name, nifty_code and gva_weight for every sector, without market data."""
+        pass
+
 class StockDataProvider(ABC):
     @abstractmethod
     def get_stocks_for_sector(self, sector_id: int) -> List[Dict]:
@@ -19,8 +24,13 @@ class StockDataProvider(ABC):
         pass
 
     @abstractmethod
-    def get_stock_details(self, ticker: str) -> Optional[Dict]:
-        """Get details for a single stock including history."""
+    def get_stocks_for_sectors(self, sector_ids: Optional[List[int]] = None) -> List[Dict]:
+        """Get all stocks for several sectors at once (every sector when sector_ids is None)."""
+        pass
+
+    @abstractmethod
+    def get_stock_details(self, ticker: str, compact_history: bool = False) -> Optional[Dict]:
+        """Get details for a single stock including history (as {"dates", "close"} lists when compact_history)."""
         pass
 
 class PortfolioDataProvider(ABC):
@@ -1,31 +1,27 @@
 from typing import List, Dict, Optional
 from sqlalchemy.orm import Session
 from app.providers.base import PortfolioDataProvider
-from app.models.models import PortfolioHolding, PortfolioTarget, Stock, Sector, StockPrice
-from sqlalchemy import desc
+from app.models.models import PortfolioHolding, PortfolioTarget, Stock, Sector
+from app.repositories.prices import latest_price_subquery
+from sqlalchemy import select
 
 class SeedPortfolioDataProvider(PortfolioDataProvider):
     def __init__(self, db: Session):
         self.db = db
 
     def get_holdings(self) -> List[Dict]:
+        latest = latest_price_subquery(select(PortfolioHolding.ticker))
         holdings = (
-            self.db.query(PortfolioHolding, Stock, Sector)
+            self.db.query(PortfolioHolding, Stock, Sector, latest.c.close_price)
             .join(Stock, PortfolioHolding.ticker == Stock.ticker)
             .join(Sector, Stock.sector_id == Sector.id)
+            .outerjoin(latest, latest.c.ticker == PortfolioHolding.ticker)
             .all()
         )
         
         result = []
-        for holding, stock, sector in holdings:
-            # unique latest price
-            latest_price_entry = (
-                self.db.query(StockPrice)
-                .filter(StockPrice.ticker == holding.ticker)
-                .order_by(desc(StockPrice.date))
-                .first()
-            )
-            current_price = float(latest_price_entry.close_price) if latest_price_entry and latest_price_entry.close_price else 0.0
+        for holding, stock, sector, close_price in holdings:
+            current_price = float(close_price) if close_price else 0.0
             
             result.append({
                 "ticker": holding.ticker,
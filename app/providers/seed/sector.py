@@ -1,13 +1,17 @@
 from typing import List, Dict, Optional
 from sqlalchemy.orm import Session
 from app.providers.base import SectorDataProvider
+from app.repositories.sectors import get_sector_catalog
 from app.models.models import Sector, SectorPerformance
-from sqlalchemy import desc, func
+from sqlalchemy import desc, func, literal_column
 
 class SeedSectorDataProvider(SectorDataProvider):
     def __init__(self, db: Session):
         self.db = db
 
+    def get_sector_catalog(self) -> List[Dict]:
+        return get_sector_catalog(self.db)
+
     def get_all_sectors(self, period: str = "3m") -> List[Dict]:
         # In a real app, we would filter by latest date. 
         # For seed data, we will assume "latest" date is the max date in DB.
@@ -43,11 +47,15 @@ class SeedSectorDataProvider(SectorDataProvider):
         if not sector:
             return None
         
+        # sector_performance is daily (see backtest_scores.py): last row of each month, 24 months
+        # Literal unit so DISTINCT ON and ORDER BY render the identical expression
+        month = func.date_trunc(literal_column("'month'"), SectorPerformance.date)
         history = (
             self.db.query(SectorPerformance)
             .filter(SectorPerformance.sector_id == sector_id)
-            .order_by(desc(SectorPerformance.date))
-            .limit(24) # 24 months
+            .distinct(month)
+            .order_by(month.desc(), desc(SectorPerformance.date))
+            .limit(24)
             .all()
         )
         
@@ -1,36 +1,38 @@
 from typing import List, Dict, Optional
+import pandas as pd
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, func
+from sqlalchemy import desc, func, select
 from app.providers.base import StockDataProvider, FundamentalsDataProvider
 from app.models.models import Stock, StockPrice, Sector
+from app.repositories.prices import latest_price_subquery
+from app.services.serialize import price_history
 
 class SeedStockDataProvider(StockDataProvider):
     def __init__(self, db: Session):
         self.db = db
 
     def get_stocks_for_sector(self, sector_id: int) -> List[Dict]:
-        stocks = (
-            self.db.query(Stock)
-            .filter(Stock.sector_id == sector_id)
-            .all()
+        return self.get_stocks_for_sectors([sector_id])
+
+    def get_stocks_for_sectors(self, sector_ids: Optional[List[int]] = None) -> List[Dict]:
+        # Stocks joined to their latest price row in a single query
+        stock_filter = select(Stock.ticker)
+        if sector_ids is not None:
+            stock_filter = stock_filter.where(Stock.sector_id.in_(sector_ids))
+        latest = latest_price_subquery(stock_filter)
+
+        query = (
+            self.db.query(Stock, latest.c.close_price, latest.c.rel_strength_1m, latest.c.rel_strength_3m)
+            .outerjoin(latest, latest.c.ticker == Stock.ticker)
         )
-        
-        # Get latest price info and scores for each stock
+        if sector_ids is not None:
+            query = query.filter(Stock.sector_id.in_(sector_ids))
+
         result = []
-        for stock in stocks:
-            # For seed data, get the latest price entry
-            latest_price = (
-                self.db.query(StockPrice)
-                .filter(StockPrice.ticker == stock.ticker)
-                .order_by(desc(StockPrice.date))
-                .first()
-            )
-            
+        for stock, close_price, rel_strength_1m, rel_strength_3m in query.all():
             # Simple composite score calculation logic placeholder or read from a pre-calculated field if exists
             # PRD says "latest scores and metrics".
             # The metrics like revenue_growth are on Stock. rel_strength on StockPrice.
-            # We need to construct the response.
-            
             result.append({
                 "ticker": stock.ticker,
                 "name": stock.name,
@@ -38,8 +40,9 @@ class SeedStockDataProvider(StockDataProvider):
                 "rank": 0, # To be computed by service or derived
                 "leader_laggard": "Leader", # Placeholder
                 "market_cap_cr": float(stock.market_cap_cr) if stock.market_cap_cr else 0.0,
-                "rel_strength_1m": float(latest_price.rel_strength_1m) if latest_price and latest_price.rel_strength_1m else 0.0,
-                "rel_strength_3m": float(latest_price.rel_strength_3m) if latest_price and latest_price.rel_strength_3m else 0.0,
+                "current_price": float(close_price) if close_price else 0.0,
+                "rel_strength_1m": float(rel_strength_1m) if rel_strength_1m else 0.0,
+                "rel_strength_3m": float(rel_strength_3m) if rel_strength_3m else 0.0,
                 "revenue_growth": float(stock.revenue_growth) if stock.revenue_growth else 0.0,
                 "roe": float(stock.roe) if stock.roe else 0.0,
                 "roic": float(stock.roic) if stock.roic else 0.0,
@@ -48,27 +51,22 @@ class SeedStockDataProvider(StockDataProvider):
             })
         return result
 
-    def get_stock_details(self, ticker: str) -> Optional[Dict]:
+    def get_stock_details(self, ticker: str, compact_history: bool = False) -> Optional[Dict]:
         stock = self.db.query(Stock).filter(Stock.ticker == ticker).first()
         if not stock:
             return None
             
         prices = (
-            self.db.query(StockPrice)
+            self.db.query(StockPrice.date, StockPrice.close_price)
             .filter(StockPrice.ticker == ticker)
             .order_by(desc(StockPrice.date))
             .limit(180) # Last 6 months approx
             .all()
         )
         
-        price_history = []
-        for p in prices:
-            price_history.append({
-                "date": p.date.isoformat(),
-                "close": float(p.close_price) if p.close_price else 0.0,
-            })
-            
-        latest_price = prices[0] if prices else None
+        frame = pd.DataFrame(prices, columns=["date", "close_price"])
+        closes = pd.Series(frame["close_price"].astype(float).to_numpy(), index=pd.to_datetime(frame["date"]))
+        history = price_history(closes, compact=compact_history)
 
         return {
             "ticker": stock.ticker,
@@ -79,7 +77,7 @@ class SeedStockDataProvider(StockDataProvider):
             "roe": float(stock.roe) if stock.roe else 0.0,
             "roic": float(stock.roic) if stock.roic else 0.0,
             "liquidity_score": float(stock.liquidity_score) if stock.liquidity_score else 0.0,
-            "price_history": price_history,
+            "price_history": history,
              # Other fields like score_breakdown, rank_in_sector need service logic
         }
 
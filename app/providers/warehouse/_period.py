@@ -0,0 +1,16 @@
+from datetime import date, timedelta
+
+# Calendar-day span of the yfinance period strings the providers ask for
+PERIOD_DAYS = {
+    "5d": 7,
+    "1mo": 31,
+    "3mo": 92,
+    "6mo": 183,
+    "1y": 366,
+    "2y": 731,
+    "5y": 1827,
+}
+
+
+def period_start(period: str) -> date:
+    return date.today() - timedelta(days=PERIOD_DAYS[period])
@@ -0,0 +1,18 @@
+from typing import List
+import pandas as pd
+from app.models.models import IndexPrice
+from app.providers.yfinance.sector import YfinanceSectorDataProvider
+from app.providers.warehouse._period import period_start
+from app.repositories.prices import load_closes
+from app.services.resample import to_interval
+
+
+class WarehouseSectorDataProvider(YfinanceSectorDataProvider):
+    """
+    Sector metrics computed from the index_prices warehouse (filled by ingest_prices.py)
+    instead of a live Yahoo download.
+    """
+
+    def _fetch_closes(self, tickers: List[str], period: str, interval: str = "1d") -> pd.DataFrame:
+        closes = load_closes(self.db, IndexPrice, tickers, since=period_start(period))
+        return to_interval(closes, interval)
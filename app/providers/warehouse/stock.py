@@ -0,0 +1,23 @@
+from typing import List
+import pandas as pd
+from app.models.models import StockPrice, IndexPrice
+from app.providers.yfinance.stock import YfinanceStockDataProvider
+from app.providers.warehouse._period import period_start
+from app.repositories.prices import load_closes
+from app.services.resample import to_interval
+from app.services.relperf import BENCHMARK
+
+
+class WarehouseStockDataProvider(YfinanceStockDataProvider):
+    """
+    Stock metrics computed from the stock_prices warehouse (filled by ingest_prices.py)
+    instead of a live Yahoo download. The benchmark is read from index_prices.
+    """
+
+    def _fetch_closes(self, tickers: List[str], period: str, interval: str = "1d") -> pd.DataFrame:
+        since = period_start(period)
+        closes = load_closes(self.db, StockPrice, [t for t in tickers if t != BENCHMARK], since=since)
+        if BENCHMARK in tickers:
+            bench = load_closes(self.db, IndexPrice, [BENCHMARK], since=since)
+            closes = pd.concat([closes, bench], axis=1)
+        return to_interval(closes, interval)
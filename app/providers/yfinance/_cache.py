@@ -0,0 +1,154 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+import yfinance as yf
+
+from app.providers.yfinance._singleflight import SingleFlight
+
+PRICE_CACHE_TTL_SECONDS = float(os.getenv("PRICE_CACHE_TTL_SECONDS", "3600"))
+PRICE_CACHE_MAX_BYTES = int(os.getenv("PRICE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+Tickers = Union[str, List[str]]
+CacheKey = Tuple[Union[str, Tuple[str, ...]], str, str]
+
+
+class PriceCache:
+    """
+    Process-wide TTL cache for yf.download results, keyed by (tickers, period, interval).
+    Entries older than ttl_seconds are treated as misses; once the combined frame size
+    goes over max_bytes the least recently used entries are evicted.
+    Cached frames are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, ttl_seconds: float, max_bytes: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[CacheKey, Tuple[float, int, pd.DataFrame]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(tickers: Tickers, period: str, interval: str) -> CacheKey:
+        # A bare ticker string and a one-element list give differently shaped frames,
+        # so only lists are normalised.
+        if isinstance(tickers, str):
+            return (tickers, period, interval)
+        return (tuple(sorted(set(tickers))), period, interval)
+
+    def get(self, key: CacheKey) -> Optional[pd.DataFrame]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, _, frame = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                self._evict(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return frame
+
+    def peek(self, key: CacheKey) -> Optional[pd.DataFrame]:
+        """Like get, but leaves the counters and LRU order untouched."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl_seconds:
+                return None
+            return entry[2]
+
+    def put(self, key: CacheKey, frame: pd.DataFrame) -> None:
+        size = int(frame.memory_usage(deep=True).sum())
+        with self._lock:
+            if key in self._entries:
+                self._evict(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (time.monotonic(), size, frame)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._evict(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
+
+    def _evict(self, key: CacheKey) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+
+price_cache = PriceCache(PRICE_CACHE_TTL_SECONDS, PRICE_CACHE_MAX_BYTES)
+_downloads = SingleFlight()
+
+
+def cached_download(tickers: Tickers, period: str, interval: str = "1d") -> pd.DataFrame:
+    """
+    yf.download through the shared price cache. Concurrent misses for the same key wait
+    on a single in-flight download and share its frame. Empty results are not cached
+    since they usually mean Yahoo throttled or blocked the request.
+    """
+    key = price_cache.make_key(tickers, period, interval)
+    data = price_cache.get(key)
+    if data is not None:
+        return data
+
+    def fetch() -> pd.DataFrame:
+        # A previous flight may have filled the cache between our miss and now.
+        cached = price_cache.peek(key)
+        if cached is not None:
+            return cached
+        fetched = yf.download(tickers, period=period, interval=interval, progress=False)
+        if not fetched.empty:
+            price_cache.put(key, fetched)
+        return fetched
+
+    return _downloads.do(key, fetch)
+
+
+def _closes(data: pd.DataFrame, tickers: List[str]) -> pd.DataFrame:
+    closes = data["Close"] if "Close" in data.columns else data
+    if isinstance(closes, pd.Series):
+        closes = closes.to_frame(name=tickers[0])
+    return closes
+
+
+def download_closes(tickers: List[str], period: str, interval: str = "1d") -> pd.DataFrame:
+    """
+    Close prices (dates x tickers) from cached_download. Single-ticker downloads come back
+    from some yfinance versions without a ticker level, so they are re-labelled here.
+    """
+    return _closes(cached_download(tickers, period=period, interval=interval), tickers)
+
+
+def peek_closes(tickers: List[str], periods: Sequence[str], interval: str = "1d") -> Optional[pd.DataFrame]:
+    """
+    Close prices from the first of periods already in the cache, without downloading.
+    Lets a caller that needs a short window reuse a longer series someone else fetched.
+    """
+    for period in periods:
+        data = price_cache.peek(price_cache.make_key(tickers, period, interval))
+        if data is not None:
+            return _closes(data, tickers)
+    return None
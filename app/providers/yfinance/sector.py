@@ -1,152 +1,172 @@
 import logging
-import yfinance as yf
 import pandas as pd
 from typing import List, Dict, Optional
 from sqlalchemy.orm import Session
 from app.providers.base import SectorDataProvider
+from app.repositories.sectors import get_sector_catalog
 from app.models.models import Sector
+from app.providers.yfinance._cache import download_closes, peek_closes
+from app.services.relperf import relative_performance, rolling_volatility, BENCHMARK, LOOKBACKS, DEFAULT_VOL_WINDOW
+from app.services.resample import to_interval, rolling_period_history
+from app.services.scoring import sector_score_trend, sector_composite_score, volatility_rank_pct
 
 logger = logging.getLogger(__name__)
 
+# Shortest daily download holding each period's lookback, shortest first
+PERIOD_WINDOWS = {
+    "1m": "3mo",
+    "3m": "6mo",
+    "6m": "1y",
+    "1y": "2y",
+}
+
+# Daily window behind the detail view: 24 monthly bars of history
+DETAIL_WINDOW = "2y"
+# Lookback behind the detail summary's score and trend; the window covers all the others too
+DETAIL_PERIOD = "3m"
+# Bars in the detail view's rolling relative performance (3 monthly bars = 3 months)
+HISTORY_PERIODS = 3
+
 
 class YfinanceSectorDataProvider(SectorDataProvider):
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, vol_window: int = DEFAULT_VOL_WINDOW):
         self.db = db
+        self.vol_window = vol_window
+
+    def _fetch_closes(self, tickers: List[str], period: str, interval: str = "1d") -> pd.DataFrame:
+        return download_closes(tickers, period=period, interval=interval)
+
+    def _fetch_window(self, tickers: List[str], window: str) -> pd.DataFrame:
+        """
+        Daily closes covering at least window: a longer series already in the price cache
+        if there is one, otherwise a download of just this window.
+        """
+        windows = list(PERIOD_WINDOWS.values())
+        cached = peek_closes(tickers, windows[windows.index(window) + 1:])
+        if cached is not None:
+            return cached
+        return self._fetch_closes(tickers, period=window, interval="1d")
+
+    def get_sector_catalog(self) -> List[Dict]:
+        return get_sector_catalog(self.db)
 
     def get_all_sectors(self, period: str = "3m") -> List[Dict]:
+        """
+        Sectors scored on the requested period's relative performance. Only the window that
+        period needs is fetched; lookbacks longer than that window are None.
+        """
+        if period not in PERIOD_WINDOWS:
+            logger.warning(f"Unknown sector period '{period}', using 3m")
+            period = "3m"
+
         sectors = self.db.query(Sector).all()
         if not sectors:
             return []
 
         tickers = [s.nifty_code for s in sectors]
-        tickers.append("^NSEI")
+        tickers.append(BENCHMARK)
 
         try:
-            data = yf.download(tickers, period="1y", interval="1d", progress=False)
+            closes = self._fetch_window(tickers, PERIOD_WINDOWS[period])
         except Exception as e:
             logger.error(f"yfinance download failed for sectors: {e}")
             return []
 
-        if "Close" in data.columns:
-            closes = data["Close"]
-        else:
-            closes = data
-
         if closes.empty:
             logger.warning("yfinance returned empty data for sectors — likely blocked by Yahoo Finance")
             return []
 
-        closes.ffill(inplace=True)
+        if BENCHMARK not in closes.columns:
+            logger.warning("yfinance returned no benchmark data for sectors")
+            return []
+
+        return self._score_sectors(sectors, closes.ffill(), period)
+
+    def _score_sectors(self, sectors: List[Sector], closes: pd.DataFrame, period: str) -> List[Dict]:
+        """
+        Sector rows from a forward-filled daily close matrix that includes the benchmark.
+        Every lookback the series is long enough for is reported; period picks the one
+        behind the trend and the relative performance part of the weighted score.
+        """
+        names = [name for name, lookback in LOOKBACKS.items() if lookback < len(closes)]
+        if period not in names:
+            logger.warning(f"Only {len(closes)} bars for sector period {period}")
+            return []
+
+        tickers = list(dict.fromkeys(s.nifty_code for s in sectors if s.nifty_code in closes.columns))
+        rel = relative_performance(closes, [LOOKBACKS[name] for name in names], tickers=tickers)
+        rel.columns = names
+        # Same close matrix, no extra fetch: latest rolling volatility per sector index
+        volatility = rolling_volatility(closes[tickers], self.vol_window).iloc[-1]
+        vol_rank = volatility_rank_pct(volatility)
+        rel_perf_score, trends = sector_score_trend(rel["1m"], rel[period])
+        scores = sector_composite_score(rel_perf_score, trends, vol_rank.reindex(rel.index))
+        scores = pd.Series(scores, index=rel.index)
+        trends = pd.Series(trends, index=rel.index)
 
         res = []
         for sector in sectors:
             ticker = sector.nifty_code
-            if ticker not in closes.columns:
+            if ticker not in rel.index:
                 continue
 
-            current_price = closes[ticker].iloc[-1]
-            nifty_current = closes["^NSEI"].iloc[-1]
-
-            def calculate_rel_perf(days_back: int) -> float:
-                if len(closes) <= days_back:
-                    return 0.0
-                past_price = closes[ticker].iloc[-(days_back + 1)]
-                past_nifty = closes["^NSEI"].iloc[-(days_back + 1)]
-
-                if past_price == 0 or past_nifty == 0 or pd.isna(past_price) or pd.isna(past_nifty):
-                    return 0.0
-
-                sector_return = (current_price - past_price) / past_price * 100
-                nifty_return = (nifty_current - past_nifty) / past_nifty * 100
-                return sector_return - nifty_return
-
-            rel_perf_1m = calculate_rel_perf(21)
-            rel_perf_3m = calculate_rel_perf(63)
-            rel_perf_6m = calculate_rel_perf(126)
-            rel_perf_1y = calculate_rel_perf(252)
-
-            score = 50 + rel_perf_3m * 2
-            score = max(0, min(100, score))
-
-            if rel_perf_1m > 2 and rel_perf_3m > 0:
-                trend = "Improving"
-            elif rel_perf_1m < -2 and rel_perf_3m < 0:
-                trend = "Deteriorating"
-            else:
-                trend = "Stable"
-
-            res.append({
+            row = {
                 "id": sector.id,
                 "name": sector.name,
                 "nifty_code": sector.nifty_code,
                 "gva_weight": float(sector.gva_weight),
-                "trend": trend,
-                "score": float(score),
-                "rel_perf_1m": float(rel_perf_1m),
-                "rel_perf_3m": float(rel_perf_3m),
-                "rel_perf_6m": float(rel_perf_6m),
-                "rel_perf_1y": float(rel_perf_1y),
-            })
+                "period": period,
+                "trend": trends[ticker],
+                "score": float(scores[ticker]),
+                "volatility": float(volatility[ticker]) if not pd.isna(volatility[ticker]) else None,
+                "volatility_rank_pct": float(vol_rank[ticker]) if not pd.isna(vol_rank[ticker]) else 50.0,
+            }
+            for name in LOOKBACKS:
+                row[f"rel_perf_{name}"] = float(rel.at[ticker, name]) if name in names else None
+            res.append(row)
 
         return res
 
     def get_sector_details(self, sector_id: int) -> Optional[Dict]:
-        sector = self.db.query(Sector).filter(Sector.id == sector_id).first()
+        """
+        Summary stats (every lookback through 1y, scored on 3m) and monthly 3-month relative
+        performance history, both derived from the canonical daily series of every sector
+        index (the same download get_all_sectors uses for 1y), so a warm cache serves this
+        without any fetch.
+        """
+        sectors = self.db.query(Sector).all()
+        sector = next((s for s in sectors if s.id == sector_id), None)
         if not sector:
             return None
 
-        tickers = [sector.nifty_code, "^NSEI"]
+        tickers = [s.nifty_code for s in sectors]
+        tickers.append(BENCHMARK)
         try:
-            data = yf.download(tickers, period="2y", interval="1mo", progress=False)
+            closes = self._fetch_window(tickers, DETAIL_WINDOW)
         except Exception as e:
             logger.error(f"yfinance download failed for sector {sector_id}: {e}")
-            data = pd.DataFrame()
-
-        if "Close" in data.columns:
-            closes = data["Close"]
-        else:
-            closes = data
-
-        history = []
-        if not closes.empty and sector.nifty_code in closes.columns:
-            closes.ffill(inplace=True)
-            for i in range(len(closes)):
-                if i < 3:
-                    continue
-
-                current_price = closes[sector.nifty_code].iloc[i]
-                past_price = closes[sector.nifty_code].iloc[i - 3]
-                current_nifty = closes["^NSEI"].iloc[i]
-                past_nifty = closes["^NSEI"].iloc[i - 3]
-
-                if pd.isna(current_price) or pd.isna(past_price):
-                    continue
-
-                sector_ret_3m = (current_price - past_price) / past_price * 100
-                nifty_ret_3m = (current_nifty - past_nifty) / past_nifty * 100
-                rel_perf_3m = sector_ret_3m - nifty_ret_3m
-
-                score = max(0.0, min(100.0, 50 + rel_perf_3m * 2))
-                trend = "Stable"
-                if rel_perf_3m > 5:
-                    trend = "Improving"
-                elif rel_perf_3m < -5:
-                    trend = "Deteriorating"
-
-                history.append({
-                    "date": closes.index[i].strftime("%Y-%m-%d"),
-                    "score": float(score),
-                    "rel_perf_3m": float(rel_perf_3m),
-                    "trend": trend,
-                })
-
-        history.reverse()
-
-        all_sectors = self.get_all_sectors()
-        sector_stats = next((s for s in all_sectors if s["id"] == sector_id), None)
+            return None
+
+        if closes.empty or BENCHMARK not in closes.columns or sector.nifty_code not in closes.columns:
+            logger.warning(f"No price data for sector {sector_id}")
+            return None
 
+        closes = closes.ffill()
+        sector_stats = next((s for s in self._score_sectors(sectors, closes, DETAIL_PERIOD) if s["id"] == sector_id), None)
         if not sector_stats:
             return None
 
-        sector_stats["history"] = history
+        monthly = to_interval(closes[[sector.nifty_code, BENCHMARK]], "1mo")
+        history = rolling_period_history(monthly[sector.nifty_code], monthly[BENCHMARK], HISTORY_PERIODS)
+        # Newest first
+        history = history.iloc[::-1]
+        sector_stats["history"] = [
+            {"date": d, "score": score, "rel_perf_3m": rel_perf, "trend": trend}
+            for d, score, rel_perf, trend in zip(
+                history.index.strftime("%Y-%m-%d").tolist(),
+                history["score"].tolist(),
+                history["rel_perf"].tolist(),
+                history["trend"].tolist(),
+            )
+        ]
         return sector_stats
@@ -1,10 +1,15 @@
 import logging
-import yfinance as yf
 import pandas as pd
 from typing import List, Dict, Optional
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from app.providers.base import StockDataProvider
 from app.models.models import Stock
+from app.providers.yfinance._cache import download_closes
+from app.repositories.scores import get_score_row
+from app.services.relperf import relative_performance, BENCHMARK, LOOKBACKS
+from app.services.serialize import price_history
+from app.services.scoring import STOCK_WEIGHT_REL_STRENGTH, STOCK_WEIGHT_REV_GROWTH, STOCK_WEIGHT_ROE, STOCK_WEIGHT_ROIC
 
 logger = logging.getLogger(__name__)
 
@@ -13,55 +18,52 @@ class YfinanceStockDataProvider(StockDataProvider):
     def __init__(self, db: Session):
         self.db = db
 
+    def _fetch_closes(self, tickers: List[str], period: str, interval: str = "1d") -> pd.DataFrame:
+        return download_closes(tickers, period=period, interval=interval)
+
     def get_stocks_for_sector(self, sector_id: int) -> List[Dict]:
-        stocks = self.db.query(Stock).filter(Stock.sector_id == sector_id).all()
+        return self.get_stocks_for_sectors([sector_id])
+
+    def get_stocks_for_sectors(self, sector_ids: Optional[List[int]] = None) -> List[Dict]:
+        query = self.db.query(Stock)
+        if sector_ids is not None:
+            query = query.filter(Stock.sector_id.in_(sector_ids))
+        stocks = query.all()
         if not stocks:
             return []
 
+        # One batched download for every constituent plus the benchmark
         tickers = [s.ticker for s in stocks]
-        tickers.append("^NSEI")
+        tickers.append(BENCHMARK)
 
         try:
-            data = yf.download(tickers, period="6mo", interval="1d", progress=False)
+            closes = self._fetch_closes(tickers, period="6mo", interval="1d")
         except Exception as e:
-            logger.error(f"yfinance download failed for sector {sector_id} stocks: {e}")
+            logger.error(f"yfinance download failed for stocks in sectors {sector_ids}: {e}")
             return []
 
-        if "Close" in data.columns:
-            closes = data["Close"]
-        else:
-            closes = data
-
         if closes.empty:
             logger.warning("yfinance returned empty data for stocks — likely blocked by Yahoo Finance")
             return []
 
-        closes.ffill(inplace=True)
+        if BENCHMARK not in closes.columns:
+            logger.warning("yfinance returned no benchmark data for stocks")
+            return []
+
+        closes = closes.ffill()
+
+        tickers = list(dict.fromkeys(s.ticker for s in stocks if s.ticker in closes.columns))
+        rel = relative_performance(closes, [LOOKBACKS["1m"], LOOKBACKS["3m"]], tickers=tickers)
+        last_prices = closes.iloc[-1]
 
         res = []
         for stock in stocks:
             ticker = stock.ticker
-            if ticker not in closes.columns:
+            if ticker not in rel.index:
                 continue
 
-            current_price = closes[ticker].iloc[-1]
-            nifty_current = closes["^NSEI"].iloc[-1]
-
-            def calculate_rel_strength(days_back: int) -> float:
-                if len(closes) <= days_back:
-                    return 0.0
-                past_price = closes[ticker].iloc[-(days_back + 1)]
-                past_nifty = closes["^NSEI"].iloc[-(days_back + 1)]
-
-                if past_price == 0 or past_nifty == 0 or pd.isna(past_price) or pd.isna(past_nifty):
-                    return 0.0
-
-                stock_return = (current_price - past_price) / past_price * 100
-                nifty_return = (nifty_current - past_nifty) / past_nifty * 100
-                return stock_return - nifty_return
-
-            rel_strength_1m = calculate_rel_strength(21)
-            rel_strength_3m = calculate_rel_strength(63)
+            current_price = last_prices[ticker]
+            rel_strength_1m, rel_strength_3m = rel.loc[ticker]
 
             res.append({
                 "ticker": stock.ticker,
@@ -70,6 +72,7 @@ class YfinanceStockDataProvider(StockDataProvider):
                 "rank": 0,
                 "leader_laggard": "Leader",
                 "market_cap_cr": float(stock.market_cap_cr) if stock.market_cap_cr else 0.0,
+                "current_price": float(current_price) if not pd.isna(current_price) else 0.0,
                 "rel_strength_1m": float(rel_strength_1m),
                 "rel_strength_3m": float(rel_strength_3m),
                 "revenue_growth": float(stock.revenue_growth) if stock.revenue_growth else 0.0,
@@ -81,36 +84,22 @@ class YfinanceStockDataProvider(StockDataProvider):
 
         return res
 
-    def get_stock_details(self, ticker: str) -> Optional[Dict]:
+    def get_stock_details(self, ticker: str, compact_history: bool = False) -> Optional[Dict]:
         from app.models.models import PortfolioHolding
         stock = self.db.query(Stock).filter(Stock.ticker == ticker).first()
         if not stock:
             return None
 
         try:
-            data = yf.download(ticker, period="6mo", interval="1d", progress=False)
+            closes = self._fetch_closes([ticker], period="6mo", interval="1d")
         except Exception as e:
             logger.error(f"yfinance download failed for {ticker}: {e}")
-            data = pd.DataFrame()
-
-        price_history = []
-        current_price = 0.0
-
-        if not data.empty:
-            if "Close" in data.columns:
-                closes = data["Close"]
-            else:
-                closes = data
-            closes.ffill(inplace=True)
+            closes = pd.DataFrame()
 
-            for idx, row in data.iterrows():
-                close_price = row["Close"] if "Close" in data.columns else row
-                if isinstance(close_price, pd.Series):
-                    close_price = close_price.iloc[0]
-
-                valid_price = float(close_price) if not pd.isna(close_price) else 0.0
-                price_history.append({"date": idx.strftime("%Y-%m-%d"), "close": valid_price})
-                current_price = valid_price
+        series = closes[ticker].ffill() if not closes.empty and ticker in closes.columns else pd.Series(dtype=float)
+        history = price_history(series, compact=compact_history)
+        last_close = series.iloc[-1] if len(series) else float("nan")
+        current_price = float(last_close) if not pd.isna(last_close) else 0.0
 
         holding = self.db.query(PortfolioHolding).filter(PortfolioHolding.ticker == ticker).first()
         pnl_pct = None
@@ -120,18 +109,38 @@ class YfinanceStockDataProvider(StockDataProvider):
             if invested > 0:
                 pnl_pct = ((current_val - invested) / invested) * 100
 
-        all_sector_stocks = self.db.query(Stock).filter(Stock.sector_id == stock.sector_id).all()
-        scored_stocks = [(s.ticker, float(s.liquidity_score or 0) * 10) for s in all_sector_stocks]
-        scored_stocks.sort(key=lambda x: x[1], reverse=True)
-
-        rank = 1
-        for i, (t, _) in enumerate(scored_stocks):
-            if t == ticker:
-                rank = i + 1
-                break
-
-        total_stocks = len(all_sector_stocks)
-        percentile = 100 - ((rank / total_stocks) * 100) if total_stocks > 0 else 100
+        snapshot = get_score_row(self.db, ticker)
+        if snapshot is not None:
+            composite_score = float(snapshot.composite_score)
+            leader_laggard = snapshot.leader_laggard
+            rank_in_sector = {
+                "rank": snapshot.rank,
+                "total": snapshot.total,
+                "percentile": float(snapshot.percentile),
+            }
+            score_breakdown = {
+                "rel_strength_contribution": float(snapshot.rel_strength_rank_pct or 0) * STOCK_WEIGHT_REL_STRENGTH,
+                "revenue_growth_contribution": float(snapshot.revenue_growth_rank_pct or 0) * STOCK_WEIGHT_REV_GROWTH,
+                "roe_contribution": float(snapshot.roe_rank_pct or 0) * STOCK_WEIGHT_ROE,
+                "roic_contribution": float(snapshot.roic_rank_pct or 0) * STOCK_WEIGHT_ROIC,
+            }
+        else:
+            # No snapshot yet: rank by liquidity score with two counts instead of loading the sector
+            composite_score = float(stock.liquidity_score or 0) * 10
+            leader_laggard = "Leader"
+            peers = self.db.query(func.count(Stock.ticker)).filter(Stock.sector_id == stock.sector_id)
+            total_stocks = peers.scalar()
+            rank = peers.filter(
+                func.coalesce(Stock.liquidity_score, 0) > float(stock.liquidity_score or 0)
+            ).scalar() + 1
+            percentile = 100 - ((rank / total_stocks) * 100) if total_stocks > 0 else 100
+            rank_in_sector = {"rank": rank, "total": total_stocks, "percentile": percentile}
+            score_breakdown = {
+                "rel_strength_contribution": 10.0,
+                "revenue_growth_contribution": 10.0,
+                "roe_contribution": 10.0,
+                "roic_contribution": 10.0,
+            }
 
         return {
             "ticker": stock.ticker,
@@ -147,14 +156,9 @@ class YfinanceStockDataProvider(StockDataProvider):
             "roe": float(stock.roe) if stock.roe else 0.0,
             "roic": float(stock.roic) if stock.roic else 0.0,
             "liquidity_score": float(stock.liquidity_score) if stock.liquidity_score else 0.0,
-            "composite_score": float(stock.liquidity_score or 0) * 10,
-            "price_history": price_history,
-            "leader_laggard": "Leader",
-            "rank_in_sector": {"rank": rank, "total": total_stocks, "percentile": percentile},
-            "score_breakdown": {
-                "rel_strength_contribution": 10.0,
-                "revenue_growth_contribution": 10.0,
-                "roe_contribution": 10.0,
-                "roic_contribution": 10.0,
-            },
+            "composite_score": composite_score,
+            "price_history": history,
+            "leader_laggard": leader_laggard,
+            "rank_in_sector": rank_in_sector,
+            "score_breakdown": score_breakdown,
         }
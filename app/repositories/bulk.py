@@ -0,0 +1,58 @@
+from typing import Any, Dict, List, Optional, Sequence
+from sqlalchemy import update, values, column
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+# Rows per INSERT ... ON CONFLICT statement
+UPSERT_CHUNK_SIZE = 1000
+
+
+def bulk_update_from_values(db: Session, model, key_attr, value_attr, pairs: Dict[Any, Any]) -> List[Any]:
+    """
+    Set value_attr for many rows in one statement:
+    UPDATE ... SET value = v.new_value FROM (VALUES ...) v WHERE key = v.match_key RETURNING key.
+    Returns the keys that matched a row; does not commit.
+    """
+    if not pairs:
+        return []
+
+    data = values(
+        column("match_key", key_attr.type),
+        column("new_value", value_attr.type),
+        name="v",
+    ).data(list(pairs.items()))
+
+    stmt = (
+        update(model)
+        .where(key_attr == data.c.match_key)
+        .values({value_attr.key: data.c.new_value})
+        .returning(key_attr)
+        .execution_options(synchronize_session=False)
+    )
+    return db.execute(stmt).scalars().all()
+
+
+def upsert_rows(
+    db: Session,
+    model,
+    rows: List[Dict],
+    key_cols: Sequence[str],
+    extra_set: Optional[Dict[str, Any]] = None,
+) -> int:
+    """
+    Bulk insert rows in chunks, overwriting the non-key columns of any row whose key_cols
+    (a primary key or unique constraint) already exist. extra_set adds SQL expressions to
+    the update. Returns the number of rows sent; does not commit.
+    """
+    if not rows:
+        return 0
+
+    update_cols = [c for c in rows[0].keys() if c not in key_cols]
+    for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        stmt = insert(model).values(rows[start:start + UPSERT_CHUNK_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key_cols),
+            set_={**{c: stmt.excluded[c] for c in update_cols}, **(extra_set or {})},
+        )
+        db.execute(stmt)
+    return len(rows)
@@ -0,0 +1,71 @@
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.models.models import StockPrice
+from app.repositories.bulk import upsert_rows
+
+
+def get_latest_dates(db: Session, model, tickers: List[str]) -> Dict[str, date]:
+    """
+    Latest stored bar date per ticker for a (ticker, date) keyed price table.
+    Tickers with no stored bars are absent from the result.
+    """
+    rows = (
+        db.query(model.ticker, func.max(model.date))
+        .filter(model.ticker.in_(tickers))
+        .group_by(model.ticker)
+        .all()
+    )
+    return {ticker: latest for ticker, latest in rows}
+
+
+def get_price_watermark(db: Session) -> Tuple[Optional[date], Optional[datetime]]:
+    """
+    (latest bar date, latest write time) in stock_prices. Moves whenever ingestion adds
+    a trading day or rewrites an existing bar, in whichever process it ran.
+    """
+    return tuple(db.query(func.max(StockPrice.date), func.max(StockPrice.updated_at)).one())
+
+
+def latest_price_subquery(tickers=None):
+    """
+    Latest stock_prices row per ticker (DISTINCT ON ticker), as a subquery that can be
+    joined in place of a per-ticker ORDER BY date DESC LIMIT 1 lookup.
+    tickers may be a list or a selectable of tickers; None means every ticker.
+    """
+    query = (
+        select(StockPrice)
+        .distinct(StockPrice.ticker)
+        .order_by(StockPrice.ticker, StockPrice.date.desc())
+    )
+    if tickers is not None:
+        query = query.where(StockPrice.ticker.in_(tickers))
+    return query.subquery("latest_price")
+
+
+def upsert_prices(db: Session, model, rows: List[Dict]) -> int:
+    """
+    Bulk insert price rows, overwriting the non-key columns of any (ticker, date) that
+    already exists and stamping updated_at where the table has it. Does not commit.
+    """
+    touch = {"updated_at": func.now()} if "updated_at" in model.__table__.c else None
+    return upsert_rows(db, model, rows, ("ticker", "date"), touch)
+
+
+def load_closes(db: Session, model, tickers: List[str], since: Optional[date] = None) -> pd.DataFrame:
+    """
+    Stored closes pivoted to a dates x tickers frame, oldest first.
+    """
+    query = db.query(model.date, model.ticker, model.close_price).filter(model.ticker.in_(tickers))
+    if since is not None:
+        query = query.filter(model.date >= since)
+    rows = query.all()
+    if not rows:
+        return pd.DataFrame()
+
+    frame = pd.DataFrame(rows, columns=["date", "ticker", "close_price"])
+    closes = frame.pivot(index="date", columns="ticker", values="close_price").astype(float)
+    closes.index = pd.to_datetime(closes.index)
+    return closes.sort_index()
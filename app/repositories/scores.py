@@ -0,0 +1,63 @@
+from datetime import date
+from typing import Dict, List, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session, joinedload
+from app.models.models import SectorPerformance, StockScore
+from app.repositories.bulk import upsert_rows
+
+
+def upsert_scores(db: Session, rows: List[Dict]) -> int:
+    """
+    Write a score snapshot, replacing any rows already stored for the same (ticker, date).
+    Does not commit.
+    """
+    return upsert_rows(db, StockScore, rows, ("ticker", "date"))
+
+
+def latest_score_date(db: Session) -> Optional[date]:
+    return db.query(func.max(StockScore.date)).scalar()
+
+
+def get_score_row(db: Session, ticker: str) -> Optional[StockScore]:
+    """
+    Most recent snapshot row for one ticker (primary key lookup on ticker, date).
+    """
+    return (
+        db.query(StockScore)
+        .filter(StockScore.ticker == ticker)
+        .order_by(StockScore.date.desc())
+        .first()
+    )
+
+
+def get_leaderboard(
+    db: Session,
+    sector_id: Optional[int] = None,
+    limit: int = 10,
+    as_of: Optional[date] = None,
+) -> List[StockScore]:
+    """
+    Top-N stocks by composite score from one snapshot date (the latest by default),
+    optionally within a single sector. Served by ix_stock_scores_date_sector_score.
+    """
+    as_of = as_of or latest_score_date(db)
+    if as_of is None:
+        return []
+
+    query = (
+        db.query(StockScore)
+        .options(joinedload(StockScore.stock))
+        .filter(StockScore.date == as_of)
+    )
+    if sector_id is not None:
+        query = query.filter(StockScore.sector_id == sector_id)
+    return query.order_by(StockScore.composite_score.desc(), StockScore.ticker).limit(limit).all()
+
+
+def upsert_sector_performance(db: Session, rows: List[Dict]) -> int:
+    """
+    Bulk write sector_performance rows, overwriting any existing (sector_id, date).
+    Does not commit.
+    """
+    # (sector_id, date) resolves to uq_sector_date
+    return upsert_rows(db, SectorPerformance, rows, ("sector_id", "date"))
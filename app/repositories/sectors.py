@@ -0,0 +1,38 @@
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.models.models import Sector
+
+# Sectors only change when seed.py runs, in its own process, so the catalog is cached in
+# process and the TTL is the only refresh: API workers pick up a reseed within this window
+SECTOR_CATALOG_TTL_SECONDS = float(os.getenv("SECTOR_CATALOG_TTL_SECONDS", "600"))
+
+_catalog_lock = threading.Lock()
+_catalog: Optional[Tuple[float, List[Dict]]] = None
+
+
+def get_sector_catalog(db: Session) -> List[Dict]:
+    """
+    Sector metadata (id, name, nifty_code, gva_weight) ordered by id, with no market data.
+    Callers get their own list of copies.
+    """
+    global _catalog
+    with _catalog_lock:
+        cached = _catalog
+    if cached is not None and time.monotonic() - cached[0] < SECTOR_CATALOG_TTL_SECONDS:
+        return [dict(s) for s in cached[1]]
+
+    catalog = [
+        {
+            "id": sector.id,
+            "name": sector.name,
+            "nifty_code": sector.nifty_code,
+            "gva_weight": float(sector.gva_weight),
+        }
+        for sector in db.query(Sector).order_by(Sector.id).all()
+    ]
+    with _catalog_lock:
+        _catalog = (time.monotonic(), catalog)
+    return [dict(s) for s in catalog]
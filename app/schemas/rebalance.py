@@ -35,3 +35,22 @@ class RebalanceRunResponse(BaseModel):
 
 class SuggestionAction(BaseModel):
     suggestion_id: int
+
+class SimulationRequest(BaseModel):
+    # Values to sweep per constraint; an empty list keeps the stored constraint
+    max_stock_weight: List[float] = []
+    max_sector_cap: List[float] = []
+    max_trades_per_run: List[int] = []
+    engine: str = "greedy"
+
+class SimulationResult(BaseModel):
+    constraints: Dict[str, float]
+    drift_after: float
+    turnover_cr: float
+    turnover_pct: float
+    trade_count: int
+
+class SimulationResponse(BaseModel):
+    drift_before: float
+    total_value_cr: float
+    results: List[SimulationResult]
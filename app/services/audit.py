@@ -0,0 +1,118 @@
+import logging
+import os
+import queue
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from sqlalchemy import insert
+from app.db.session import session_scope
+from app.models.models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_FLUSH_INTERVAL_SECONDS = float(os.getenv("AUDIT_FLUSH_INTERVAL_SECONDS", "1.0"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+
+
+class AuditSink:
+    """
+    Write-behind audit log. record() stamps and enqueues an event and returns at once;
+    a background thread flushes the queue to audit_log every flush_interval seconds in
+    multi-row inserts. If the queue is full the caller flushes inline instead of
+    dropping events (a failed inline flush is requeued, never raised to the caller),
+    and stop() writes out whatever is still queued.
+    """
+
+    def __init__(self, max_queue: int, flush_interval: float, batch_size: int):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-sink", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def record(self, action_type: str, description: str, payload: Any = None) -> None:
+        event = {
+            "created_at": datetime.now(),
+            "action_type": action_type,
+            "description": description,
+            "payload": payload,
+        }
+        if self._thread is None:
+            # Not running inside the app (scripts, jobs): write through
+            self._write([event])
+            return
+
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            logger.warning("Audit queue full; flushing inline")
+            batch = self._drain(self._queue.qsize()) + [event]
+            try:
+                self._write(batch)
+            except Exception:
+                # The caller's change is already committed; keep what fits and log the rest
+                logger.exception(f"Inline audit flush of {len(batch)} events failed; requeueing")
+                self._requeue(batch)
+
+    def flush(self) -> int:
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch = self._drain(self.batch_size)
+                if not batch:
+                    return written
+                try:
+                    self._write(batch)
+                except Exception:
+                    self._requeue(batch)
+                    raise
+                written += len(batch)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Audit flush failed; will retry")
+
+    def _drain(self, limit: int) -> List[Dict[str, Any]]:
+        events = []
+        while len(events) < limit:
+            try:
+                events.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return events
+
+    def _requeue(self, events: List[Dict[str, Any]]) -> None:
+        for event in events:
+            try:
+                self._queue.put_nowait(event)
+            except queue.Full:
+                logger.error(f"Audit queue full; dropped {event['action_type']} event from {event['created_at']}")
+
+    @staticmethod
+    def _write(events: List[Dict[str, Any]]) -> None:
+        if not events:
+            return
+        with session_scope() as db:
+            db.execute(insert(AuditLog), events)
+
+
+audit_sink = AuditSink(AUDIT_QUEUE_SIZE, AUDIT_FLUSH_INTERVAL_SECONDS, AUDIT_BATCH_SIZE)
@@ -0,0 +1,167 @@
+import logging
+from datetime import date, timedelta
+from typing import Dict, List
+import pandas as pd
+import yfinance as yf
+from sqlalchemy.orm import Session
+
+from app.db.session import session_scope
+from app.models.models import Sector, Stock, StockPrice, IndexPrice
+from app.repositories.prices import load_closes
+from app.repositories.scores import upsert_scores, upsert_sector_performance
+from app.services.relperf import rolling_relative_returns, rolling_volatility, BENCHMARK, LOOKBACKS, DEFAULT_VOL_WINDOW
+from app.services.scoring import sector_score_trend, sector_composite_score, volatility_rank_pct
+from app.services.snapshot import score_frame
+
+logger = logging.getLogger(__name__)
+
+# Calendar days of closes loaded in front of the first backtest date, enough for a 1y lookback
+HISTORY_CONTEXT_DAYS = 380
+
+BACKTEST_SOURCES = ("yfinance", "warehouse")
+
+
+def sector_history(
+    closes: pd.DataFrame,
+    sector_ids: Dict[str, List[int]],
+    start: date,
+    vol_window: int = DEFAULT_VOL_WINDOW,
+) -> List[Dict]:
+    """
+    sector_performance rows for every date from start onwards. closes is a daily dates x
+    tickers matrix holding the sector indexes (keys of sector_ids) and the benchmark, with
+    at least a year of history in front of start. Relative performance, score and trend are
+    computed for all dates at once with rolling operations, scored as the live provider
+    does (volatility ranked across sectors on each date).
+    """
+    tickers = [t for t in sector_ids if t in closes.columns]
+    if not tickers or BENCHMARK not in closes.columns:
+        return []
+
+    closes = closes.sort_index().ffill()
+    listed = closes[tickers].notna()
+    rel = {
+        name: rolling_relative_returns(closes[tickers], closes[BENCHMARK], lookback)
+        for name, lookback in LOOKBACKS.items()
+    }
+    rel_perf_score, trend = sector_score_trend(rel["1m"].to_numpy(), rel["3m"].to_numpy())
+    vol_rank = volatility_rank_pct(rolling_volatility(closes[tickers], vol_window))
+    score = sector_composite_score(rel_perf_score, trend, vol_rank.to_numpy())
+
+    fields = {f"rel_perf_{name}": frame.round(2) for name, frame in rel.items()}
+    fields["score"] = pd.DataFrame(score, index=closes.index, columns=tickers).round(2)
+    fields["trend"] = pd.DataFrame(trend, index=closes.index, columns=tickers)
+
+    since = pd.Timestamp(start)
+    long = pd.concat(
+        {name: frame.where(listed).loc[since:].stack() for name, frame in fields.items()},
+        axis=1,
+    )
+    if long.empty:
+        return []
+    long.index = long.index.set_names(["date", "ticker"])
+    long = long.reset_index().dropna(subset=["score"])
+
+    long["sector_id"] = long["ticker"].map(sector_ids)
+    long = long.explode("sector_id").drop(columns="ticker")
+    long["date"] = pd.to_datetime(long["date"]).dt.date
+    return long.astype(object).to_dict("records")
+
+
+def stock_history(closes: pd.DataFrame, benchmark: pd.Series, stocks: List[Stock], start: date) -> List[Dict]:
+    """
+    stock_scores rows for every date from start onwards. The 3m relative strength comes
+    from the daily closes; fundamentals have no history, so their current values are used
+    on every date. Ranks are taken within each sector on each date in one grouped pass.
+    """
+    tickers = [s.ticker for s in stocks if s.ticker in closes.columns]
+    if not tickers:
+        return []
+
+    closes = closes[tickers].sort_index().ffill()
+    rel_3m = rolling_relative_returns(closes, benchmark.sort_index().ffill(), LOOKBACKS["3m"])
+
+    long = rel_3m.where(closes.notna()).loc[pd.Timestamp(start):].stack()
+    if long.empty:
+        return []
+    long.index = long.index.set_names(["date", "ticker"])
+    long = long.rename("rel_strength_3m").reset_index()
+    long["date"] = pd.to_datetime(long["date"]).dt.date
+
+    fundamentals = pd.DataFrame([
+        {
+            "ticker": s.ticker,
+            "sector_id": s.sector_id,
+            "revenue_growth": float(s.revenue_growth) if s.revenue_growth else 0.0,
+            "roe": float(s.roe) if s.roe else 0.0,
+            "roic": float(s.roic) if s.roic else 0.0,
+        }
+        for s in stocks
+    ])
+    return score_frame(long.merge(fundamentals, on="ticker"))
+
+
+def _download_closes(tickers: List[str], since: date) -> pd.DataFrame:
+    data = yf.download(tickers, start=since.isoformat(), interval="1d", progress=False)
+    if data.empty:
+        return pd.DataFrame()
+    closes = data["Close"]
+    if isinstance(closes, pd.Series):
+        closes = closes.to_frame(name=tickers[0])
+    return closes
+
+
+def _load_history(db: Session, source: str, index_tickers: List[str], stock_tickers: List[str], since: date):
+    if source == "warehouse":
+        return (
+            load_closes(db, IndexPrice, index_tickers, since=since),
+            load_closes(db, StockPrice, stock_tickers, since=since),
+        )
+    return _download_closes(index_tickers, since), _download_closes(stock_tickers, since)
+
+
+def backtest_scores(db: Session, years: int, source: str = "yfinance") -> Dict[str, int]:
+    """
+    Rebuild sector_performance and stock_scores for each trading day of the last `years`
+    years from one load of daily closes. Existing rows for those dates are overwritten.
+    Does not commit.
+    """
+    start = date.today() - timedelta(days=365 * years)
+    since = start - timedelta(days=HISTORY_CONTEXT_DAYS)
+
+    sectors = db.query(Sector).all()
+    stocks = db.query(Stock).all()
+    sector_ids: Dict[str, List[int]] = {}
+    for sector in sectors:
+        sector_ids.setdefault(sector.nifty_code, []).append(sector.id)
+
+    index_closes, stock_closes = _load_history(
+        db, source, list(sector_ids) + [BENCHMARK], [s.ticker for s in stocks], since
+    )
+    if index_closes.empty or BENCHMARK not in index_closes.columns:
+        logger.warning(f"No benchmark history from {source}; backtest skipped")
+        return {"sector_performance": 0, "stock_scores": 0}
+
+    sector_rows = sector_history(index_closes, sector_ids, start)
+    stock_rows = []
+    if not stock_closes.empty:
+        stock_rows = stock_history(stock_closes, index_closes[BENCHMARK], stocks, start)
+
+    return {
+        "sector_performance": upsert_sector_performance(db, sector_rows),
+        "stock_scores": upsert_scores(db, stock_rows),
+    }
+
+
+def run_backtest(years: int, source: str = "yfinance") -> Dict[str, int]:
+    """
+    backtest_scores for the CLI, committing both tables at once.
+    """
+    if source not in BACKTEST_SOURCES:
+        raise ValueError(f"Unknown market data source '{source}'")
+
+    with session_scope() as db:
+        written = backtest_scores(db, years, source)
+
+    logger.info(f"Backtest wrote {written['sector_performance']} sector rows and {written['stock_scores']} stock rows")
+    return written
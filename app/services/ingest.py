@@ -0,0 +1,144 @@
+import logging
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
+import yfinance as yf
+from sqlalchemy.orm import Session
+
+from app.db.session import session_scope
+from app.models.models import Sector, Stock, StockPrice, IndexPrice
+from app.repositories.prices import get_latest_dates, upsert_prices, load_closes
+from app.services.relperf import rolling_relative_returns, BENCHMARK, LOOKBACKS
+
+logger = logging.getLogger(__name__)
+
+# History fetched for tickers that have nothing stored yet
+DEFAULT_BACKFILL_PERIOD = "2y"
+# Calendar days of stored closes reloaded in front of new bars, enough for a 3m lookback
+REL_STRENGTH_CONTEXT_DAYS = 130
+
+
+def _field(data: pd.DataFrame, field: str, tickers: List[str]) -> pd.DataFrame:
+    frame = data[field]
+    if isinstance(frame, pd.Series):
+        frame = frame.to_frame(name=tickers[0])
+    return frame
+
+
+def _download_missing(
+    tickers: List[str],
+    latest: Dict[str, date],
+    backfill_period: str,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Download bars from each ticker's latest stored date onwards (the last stored bar is
+    re-fetched in case it was taken intraday). Tickers sharing a start date share one
+    request, so a warehouse that is uniformly a day behind costs a single download.
+    Returns (closes, volumes), each dates x tickers.
+    """
+    groups: Dict[Optional[date], List[str]] = {}
+    for ticker in tickers:
+        groups.setdefault(latest.get(ticker), []).append(ticker)
+
+    closes, volumes = [], []
+    for start, group in groups.items():
+        if start is None:
+            data = yf.download(group, period=backfill_period, interval="1d", progress=False)
+        else:
+            data = yf.download(group, start=start.isoformat(), interval="1d", progress=False)
+
+        if data.empty:
+            logger.warning(f"yfinance returned no bars for {len(group)} tickers from {start or backfill_period}")
+            continue
+
+        closes.append(_field(data, "Close", group))
+        if "Volume" in data.columns:
+            volumes.append(_field(data, "Volume", group))
+
+    if not closes:
+        return pd.DataFrame(), pd.DataFrame()
+    return pd.concat(closes, axis=1), pd.concat(volumes, axis=1) if volumes else pd.DataFrame()
+
+
+def _price_rows(latest: Dict[str, date], **fields: pd.DataFrame) -> List[Dict]:
+    """
+    Long-format rows, one per non-NaN close at or after the ticker's latest stored date.
+    Each keyword is a dates x tickers frame that becomes a column of the same name.
+    """
+    long = pd.concat({name: frame.stack() for name, frame in fields.items() if not frame.empty}, axis=1)
+    long.index = long.index.set_names(["date", "ticker"])
+    long = long.reset_index().dropna(subset=["close_price"])
+
+    cutoff = pd.to_datetime(long["ticker"].map(latest))
+    long = long[cutoff.isna() | (long["date"] >= cutoff)]
+
+    long["date"] = pd.to_datetime(long["date"]).dt.date
+    for col in long.columns:
+        if col == "volume":
+            long[col] = long[col].round().astype("Int64")
+        elif col not in ("date", "ticker"):
+            long[col] = long[col].round(2)
+
+    long = long.astype(object).where(long.notna(), None)
+    return long.to_dict("records")
+
+
+def ingest_index_prices(db: Session, backfill_period: str = DEFAULT_BACKFILL_PERIOD) -> int:
+    sectors = db.query(Sector).all()
+    tickers = list(dict.fromkeys([s.nifty_code for s in sectors] + [BENCHMARK]))
+
+    latest = get_latest_dates(db, IndexPrice, tickers)
+    closes, _ = _download_missing(tickers, latest, backfill_period)
+    if closes.empty:
+        return 0
+
+    return upsert_prices(db, IndexPrice, _price_rows(latest, close_price=closes))
+
+
+def ingest_stock_prices(db: Session, backfill_period: str = DEFAULT_BACKFILL_PERIOD) -> int:
+    """
+    Upsert missing stock bars along with their 1m/3m relative strength. Index prices
+    should be ingested first so the benchmark covers the new dates.
+    """
+    tickers = [t for (t,) in db.query(Stock.ticker).all()]
+    if not tickers:
+        return 0
+
+    latest = get_latest_dates(db, StockPrice, tickers)
+    closes, volumes = _download_missing(tickers, latest, backfill_period)
+    if closes.empty:
+        return 0
+
+    # Relative strength of the new bars needs a lookback of stored bars in front of them
+    since = closes.index.min().date() - timedelta(days=REL_STRENGTH_CONTEXT_DAYS)
+    stored = load_closes(db, StockPrice, tickers, since=since)
+    history = closes.combine_first(stored) if not stored.empty else closes
+    history = history.sort_index().ffill()
+
+    bench = load_closes(db, IndexPrice, [BENCHMARK], since=since)
+    if BENCHMARK in bench.columns:
+        bench = bench[BENCHMARK].reindex(history.index).ffill()
+    else:
+        logger.warning("No stored benchmark closes; relative strength will be 0")
+        bench = pd.Series(float("nan"), index=history.index)
+
+    rows = _price_rows(
+        latest,
+        close_price=closes,
+        volume=volumes,
+        rel_strength_1m=rolling_relative_returns(history, bench, LOOKBACKS["1m"]),
+        rel_strength_3m=rolling_relative_returns(history, bench, LOOKBACKS["3m"]),
+    )
+    return upsert_prices(db, StockPrice, rows)
+
+
+def run_ingestion(backfill_period: str = DEFAULT_BACKFILL_PERIOD) -> Dict[str, int]:
+    """
+    Index then stock bars, committed together; what ingest_prices.py runs on each tick.
+    """
+    with session_scope() as db:
+        index_rows = ingest_index_prices(db, backfill_period)
+        stock_rows = ingest_stock_prices(db, backfill_period)
+
+    logger.info(f"Ingested {index_rows} index bars and {stock_rows} stock bars")
+    return {"index_prices": index_rows, "stock_prices": stock_rows}
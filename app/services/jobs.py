@@ -0,0 +1,69 @@
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+REBALANCE_JOB_CONCURRENCY = int(os.getenv("REBALANCE_JOB_CONCURRENCY", "2"))
+REBALANCE_JOB_MAX_PENDING = int(os.getenv("REBALANCE_JOB_MAX_PENDING", "20"))
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class JobRunner:
+    """
+    Background jobs on a fixed number of worker threads. At most max_pending jobs may be
+    queued or running at once; submit() raises JobQueueFull beyond that so the API can
+    shed load instead of piling up work.
+    """
+
+    def __init__(self, workers: int, max_pending: int, name: str):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.name = name
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def submit(self, fn: Callable, *args) -> Future:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise JobQueueFull(f"{self._pending} {self.name} jobs already pending")
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=self.name)
+            self._pending += 1
+            executor = self._executor
+
+        try:
+            future = executor.submit(fn, *args)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(self._done)
+        return future
+
+    def pending(self) -> int:
+        with self._lock:
+            return self._pending
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _done(self, future: Future) -> None:
+        self._release()
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"{self.name} job failed: {future.exception()}")
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+
+
+rebalance_jobs = JobRunner(REBALANCE_JOB_CONCURRENCY, REBALANCE_JOB_MAX_PENDING, "rebalance-job")
@@ -0,0 +1,67 @@
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Optional
+
+# Backstop for writes this process cannot see (made through another API worker)
+PORTFOLIO_CACHE_TTL_SECONDS = float(os.getenv("PORTFOLIO_CACHE_TTL_SECONDS", "300"))
+
+
+@dataclass(frozen=True)
+class PortfolioSnapshot:
+    version: int
+    watermark: Any
+    built_at: float
+    value: Any
+    # Derived from the content by the caller, so it is stable across processes and restarts
+    etag: str
+
+
+class PortfolioSnapshotCache:
+    """
+    Process-local cache of the computed portfolio view. Every write path calls
+    invalidate(), which bumps the version; a snapshot is served while it was built
+    under the current version, against the same price watermark (latest stored price
+    date and write time, which also tracks ingestion run elsewhere), and within the TTL.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._version = 0
+        self._snapshot: Optional[PortfolioSnapshot] = None
+
+    @property
+    def version(self) -> int:
+        with self._lock:
+            return self._version
+
+    def get(self, watermark: Any) -> Optional[PortfolioSnapshot]:
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.version != self._version or snapshot.watermark != watermark:
+                return None
+            if self.ttl_seconds > 0 and time.monotonic() - snapshot.built_at > self.ttl_seconds:
+                return None
+            return snapshot
+
+    def put(self, version: int, watermark: Any, value: Any, etag: str) -> PortfolioSnapshot:
+        """
+        Store a view computed under `version` (read before computing). If a write
+        invalidated the cache meanwhile, the view is returned but not cached.
+        """
+        snapshot = PortfolioSnapshot(version, watermark, time.monotonic(), value, etag)
+        with self._lock:
+            if version == self._version:
+                self._snapshot = snapshot
+            return snapshot
+
+    def invalidate(self) -> int:
+        with self._lock:
+            self._version += 1
+            self._snapshot = None
+            return self._version
+
+
+portfolio_cache = PortfolioSnapshotCache(PORTFOLIO_CACHE_TTL_SECONDS)
@@ -1,6 +1,9 @@
 from typing import List, Dict, Any
 from dataclasses import dataclass
 from decimal import Decimal
+import numpy as np
+
+RUPEES_PER_CR = 10000000.0
 
 @dataclass
 class Suggestion:
@@ -110,7 +113,6 @@ def generate_suggestions(
             
             # If not in stocks input, check holdings
             if not price and ticker in holding_map:
-                price = holding_map[ticker]['current_price_cr'] * 10000000 # wait, price is absolute. value is cr.
                 price = holding_map[ticker].get('current_price')
 
             # If still no price, skip (safeguard)
@@ -184,3 +186,151 @@ def generate_suggestions(
             trades_count += 1
             
     return suggestions
+
+
+def optimize_suggestions(
+    holdings: List[Dict],
+    sector_exposure: List[Dict],
+    stocks: List[Dict],
+    constraints: Dict[str, float]
+) -> List[Dict]:
+    """
+    Drift-minimizing alternative to generate_suggestions. Every stock in a drifting sector
+    is a candidate (best scores bought first, worst sold first) with a capacity set by
+    max_stock_weight or the held position; each sector's full drift, limited on the buy
+    side by max_sector_cap, is filled from its candidates with one grouped cumulative sum.
+    Lots are rounded down, trades under the minimum size dropped, and the
+    max_trades_per_run largest trades kept.
+    """
+    max_stock_weight = float(constraints.get('max_stock_weight', 7.5))
+    max_sector_cap = float(constraints.get('max_sector_cap', 30.0))
+    min_trade_size_cr = float(constraints.get('min_trade_size_cr', 0.5))
+    max_trades = int(constraints.get('max_trades_per_run', 10))
+
+    total_value_cr = sum(h.get('current_value_cr', 0) for h in holdings) if holdings else 0
+    if total_value_cr <= 0 or not stocks or not sector_exposure or max_trades <= 0:
+        return []
+
+    # Sector arrays, indexed by position in sector_exposure
+    sector_pos = {sec['sector_id']: i for i, sec in enumerate(sector_exposure)}
+    sector_names = [sec.get('sector_name', '') for sec in sector_exposure]
+    actual = np.array([sec['actual_weight'] for sec in sector_exposure], dtype=float)
+    target = np.array([sec['target_weight'] for sec in sector_exposure], dtype=float)
+    drift = actual - target
+    headroom = np.maximum(max_sector_cap - actual, 0)
+    # Weight (%) to move per sector: all of the drift, buys capped by the sector limit
+    need = np.where(drift < 0, np.minimum(-drift, headroom), drift)
+    sector_capped = (drift < 0) & (headroom < -drift)
+
+    # Stock arrays, built once for the whole universe
+    holding_map = {h['ticker']: h for h in holdings}
+    n = len(stocks)
+    tickers = [s['ticker'] for s in stocks]
+    sec = np.fromiter((sector_pos.get(s.get('sector_id'), -1) for s in stocks), dtype=int, count=n)
+    price = np.fromiter(
+        (s.get('current_price') or holding_map.get(s['ticker'], {}).get('current_price') or 0.0 for s in stocks),
+        dtype=float, count=n,
+    )
+    score = np.fromiter((s.get('composite_score') or 0.0 for s in stocks), dtype=float, count=n)
+    weight = np.fromiter(
+        (holding_map[t].get('portfolio_weight', 0.0) if t in holding_map else 0.0 for t in tickers),
+        dtype=float, count=n,
+    )
+    held_qty = np.fromiter(
+        (holding_map[t]['quantity'] if t in holding_map else 0 for t in tickers),
+        dtype=int, count=n,
+    )
+
+    stock_drift = np.where(sec >= 0, drift[sec], 0.0)
+    tradable = (sec >= 0) & (price > 0)
+    buy = tradable & (stock_drift < 0)
+    sell = tradable & (stock_drift > 0) & (held_qty > 0)
+    capacity = np.where(buy, np.maximum(max_stock_weight - weight, 0), np.where(sell, weight, 0.0))
+
+    # Candidates grouped by sector, in fill order within each sector
+    cand = np.flatnonzero(capacity > 0)
+    if cand.size == 0:
+        return []
+    cand = cand[np.lexsort((np.where(buy[cand], -score[cand], score[cand]), sec[cand]))]
+    cand_sec = sec[cand]
+    cap = capacity[cand]
+
+    # Capacity already used by earlier candidates of the same sector
+    cum = np.cumsum(cap)
+    group_start = np.r_[True, cand_sec[1:] != cand_sec[:-1]]
+    before = cum - cap - np.maximum.accumulate(np.where(group_start, cum - cap, 0.0))
+    alloc = np.clip(need[cand_sec] - before, 0, cap)
+
+    qty = np.floor(alloc / 100 * total_value_cr * RUPEES_PER_CR / price[cand]).astype(int)
+    qty = np.where(sell[cand], np.minimum(qty, held_qty[cand]), qty)
+    trade_cr = qty * price[cand] / RUPEES_PER_CR
+
+    # Keep the largest trades, then list them by sector drift and fill order
+    eligible = np.flatnonzero((qty > 0) & (trade_cr >= min_trade_size_cr))
+    chosen = eligible[np.argsort(-trade_cr[eligible], kind='stable')[:max_trades]]
+    chosen = chosen[np.lexsort((chosen, -np.abs(drift[cand_sec[chosen]])))]
+    if chosen.size == 0:
+        return []
+
+    idx = cand[chosen]
+    chosen_sec = cand_sec[chosen]
+    is_sell = sell[idx]
+    delta = np.where(is_sell, -1.0, 1.0) * trade_cr[chosen] / total_value_cr * 100
+    post_weight = weight[idx] + delta
+    post_drift = drift + np.bincount(chosen_sec, weights=delta, minlength=len(sector_exposure))
+
+    binding = np.select(
+        [~is_sell & (alloc[chosen] >= cap[chosen]), ~is_sell & sector_capped[chosen_sec]],
+        ['max_stock_weight', 'max_sector_cap'],
+        default='',
+    )
+
+    suggestions = []
+    for k, i in enumerate(idx.tolist()):
+        s_pos = int(chosen_sec[k])
+        if is_sell[k]:
+            action = 'SELL'
+            rationale = f"Sell in {sector_names[s_pos]} to reduce overweight of {drift[s_pos]:.2f}%. Score: {score[i]:.1f}."
+        else:
+            action = 'BUY'
+            rationale = f"Buy in {sector_names[s_pos]} to reduce underweight of {-drift[s_pos]:.2f}%. Score: {score[i]:.1f}."
+
+        suggestions.append({
+            "action": action,
+            "ticker": tickers[i],
+            "quantity": int(qty[chosen[k]]),
+            "est_value_cr": round(float(trade_cr[chosen[k]]), 2),
+            "rationale": rationale,
+            "binding_constraint": str(binding[k]) or None,
+            "post_trade_weight": round(float(post_weight[k]), 2),
+            "post_trade_drift": round(float(post_drift[s_pos]), 2),
+        })
+
+    return suggestions
+
+# Selectable per rebalance run
+ENGINES = {
+    "greedy": generate_suggestions,
+    "optimize": optimize_suggestions,
+}
+
+def estimate_drift_after(
+    sector_exposure: List[Dict],
+    suggestions: List[Dict],
+    stocks: List[Dict],
+    total_value_cr: float
+) -> float:
+    """
+    Total absolute sector drift after applying every suggestion, at a fixed portfolio value.
+    """
+    sector_of = {s['ticker']: s.get('sector_id') for s in stocks}
+    weights = {sec['sector_id']: sec['actual_weight'] for sec in sector_exposure}
+    if total_value_cr > 0:
+        for s in suggestions:
+            sid = sector_of.get(s['ticker'])
+            if sid not in weights:
+                continue
+            change = s['est_value_cr'] / total_value_cr * 100
+            weights[sid] += change if s['action'] == 'BUY' else -change
+
+    return sum(abs(weights[sec['sector_id']] - sec['target_weight']) for sec in sector_exposure)
@@ -0,0 +1,104 @@
+from typing import Optional, Sequence, Union
+import numpy as np
+import pandas as pd
+
+BENCHMARK = "^NSEI"
+
+TRADING_DAYS_PER_YEAR = 252
+
+# Realized volatility window in trading days
+DEFAULT_VOL_WINDOW = 63
+
+# Lookbacks in trading days
+LOOKBACKS = {
+    "1m": 21,
+    "3m": 63,
+    "6m": 126,
+    "1y": 252,
+}
+
+
+def relative_returns(prices: np.ndarray, benchmark: np.ndarray, lookbacks: Sequence[int]) -> np.ndarray:
+    """
+    Relative return (asset % return minus benchmark % return) from each lookback to the
+    last row, for every column of a dates x tickers price array. Returns tickers x lookbacks.
+    A cell is 0.0 when the history is too short or either past price is zero/NaN.
+    """
+    prices = np.asarray(prices, dtype=float)
+    benchmark = np.asarray(benchmark, dtype=float)
+    lookbacks = np.asarray(lookbacks, dtype=int)
+    n = prices.shape[0]
+    if n == 0:
+        return np.zeros((prices.shape[1], len(lookbacks)))
+
+    available = lookbacks < n
+    rows = np.where(available, n - 1 - lookbacks, n - 1)
+    past = prices[rows]               # lookbacks x tickers
+    past_bench = benchmark[rows]      # lookbacks
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        asset_ret = (prices[-1] - past) / past * 100
+        bench_ret = (benchmark[-1] - past_bench) / past_bench * 100
+    rel = asset_ret - bench_ret[:, None]
+
+    bench_ok = available & (past_bench != 0) & ~np.isnan(past_bench)
+    valid = bench_ok[:, None] & (past != 0) & ~np.isnan(past)
+    return np.where(valid, rel, 0.0).T
+
+
+def relative_performance(
+    closes: Union[pd.DataFrame, np.ndarray],
+    lookbacks: Sequence[int] = tuple(LOOKBACKS.values()),
+    benchmark: Union[str, int] = BENCHMARK,
+    tickers: Optional[Sequence] = None,
+) -> Union[pd.DataFrame, np.ndarray]:
+    """
+    Tickers x lookbacks relative performance against the benchmark in one pass.
+    For a DataFrame of closes, benchmark and tickers are column labels and a DataFrame
+    indexed by ticker is returned; for an ndarray they are column positions.
+    """
+    if isinstance(closes, pd.DataFrame):
+        if tickers is None:
+            tickers = [c for c in closes.columns if c != benchmark]
+        rel = relative_returns(
+            closes[list(tickers)].to_numpy(dtype=float),
+            closes[benchmark].to_numpy(dtype=float),
+            lookbacks,
+        )
+        return pd.DataFrame(rel, index=list(tickers), columns=list(lookbacks))
+
+    closes = np.asarray(closes, dtype=float)
+    if tickers is None:
+        tickers = [i for i in range(closes.shape[1]) if i != benchmark]
+    return relative_returns(closes[:, list(tickers)], closes[:, benchmark], lookbacks)
+
+
+def rolling_relative_returns(closes: pd.DataFrame, benchmark: pd.Series, lookback: int) -> pd.DataFrame:
+    """
+    Trailing relative return over a fixed lookback at every date (dates x tickers), with the
+    same guards as relative_returns. Rows without lookback bars of history are 0.0.
+    """
+    values = closes.to_numpy(dtype=float)
+    bench = benchmark.reindex(closes.index).to_numpy(dtype=float)
+    rel = np.zeros_like(values)
+
+    if 0 < lookback < len(values):
+        past, now = values[:-lookback], values[lookback:]
+        past_bench, now_bench = bench[:-lookback], bench[lookback:]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            asset_ret = (now - past) / past * 100
+            bench_ret = (now_bench - past_bench) / past_bench * 100
+        bench_ok = (past_bench != 0) & ~np.isnan(past_bench)
+        valid = bench_ok[:, None] & (past != 0) & ~np.isnan(past)
+        rel[lookback:] = np.where(valid, asset_ret - bench_ret[:, None], 0.0)
+
+    return pd.DataFrame(rel, index=closes.index, columns=closes.columns)
+
+
+def rolling_volatility(closes: pd.DataFrame, window: int = DEFAULT_VOL_WINDOW) -> pd.DataFrame:
+    """
+    Annualized realized volatility (%) of daily log returns over a trailing window, for
+    every column and date at once (dates x tickers). Non-positive closes are ignored.
+    """
+    returns = np.log(closes.where(closes > 0)).diff()
+    return returns.rolling(window, min_periods=2).std() * np.sqrt(TRADING_DAYS_PER_YEAR) * 100
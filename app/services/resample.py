@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+from app.services.relperf import rolling_relative_returns
+
+# yfinance interval -> pandas period frequency of one bar
+INTERVAL_PERIODS = {
+    "1wk": "W",
+    "1mo": "M",
+}
+
+
+def to_interval(closes: pd.DataFrame, interval: str) -> pd.DataFrame:
+    """
+    Weekly (1wk) or monthly (1mo) bars from daily closes: the last close of each week or
+    month per ticker, labelled with the last trading date in that bar. 1d is a no-op, so
+    every interval can be served from one cached daily series.
+    """
+    if closes.empty or interval == "1d":
+        return closes
+
+    periods = closes.index.to_period(INTERVAL_PERIODS[interval])
+    bars = closes.groupby(periods).last()
+    bars.index = pd.DatetimeIndex(closes.index.to_series().groupby(periods).max().to_numpy())
+    return bars
+
+
+def rolling_period_history(closes: pd.Series, benchmark: pd.Series, periods: int) -> pd.DataFrame:
+    """
+    Relative performance over a trailing number of bars at every bar, with the detail-view
+    score (50 + 2 x rel perf, clamped to 0-100) and trend (beyond +/-5 is Improving or
+    Deteriorating). Bars without a close now and `periods` bars back are dropped.
+    """
+    frame = closes.to_frame(name="close")
+    rel = rolling_relative_returns(frame, benchmark, periods)["close"]
+
+    valid = closes.notna() & closes.shift(periods).notna()
+    valid.iloc[:periods] = False
+    rel = rel[valid]
+
+    return pd.DataFrame({
+        "rel_perf": rel,
+        "score": np.clip(50 + rel * 2, 0, 100),
+        "trend": np.select([rel > 5, rel < -5], ["Improving", "Deteriorating"], default="Stable"),
+    }, index=rel.index)
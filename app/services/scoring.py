@@ -1,4 +1,5 @@
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple, Union
+import numpy as np
 import pandas as pd
 
 # Stock weights
@@ -19,6 +20,82 @@ TREND_SCORES = {
     "Deteriorating": 0
 }
 
+def score_universe(
+    rel_strength: np.ndarray,
+    revenue_growth: np.ndarray,
+    roe: np.ndarray,
+    roic: np.ndarray,
+    sector_ids: np.ndarray,
+    dates: Optional[np.ndarray] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Score every stock in the universe at once. Inputs are aligned 1-D arrays (NaN counts as 0);
+    percentile ranks and the final rank are taken within each sector via one grouped rank.
+    Passing dates scores a long (date, ticker) history, ranking within each sector per date.
+    Returns arrays keyed by column name.
+    """
+    sector_ids = np.asarray(sector_ids)
+    groups = [sector_ids] if dates is None else [np.asarray(dates), sector_ids]
+    factors = pd.DataFrame({
+        'rel_strength': np.nan_to_num(np.asarray(rel_strength, dtype=float)),
+        'revenue_growth': np.nan_to_num(np.asarray(revenue_growth, dtype=float)),
+        'roe': np.nan_to_num(np.asarray(roe, dtype=float)),
+        'roic': np.nan_to_num(np.asarray(roic, dtype=float)),
+    })
+
+    # Percentile ranks (0-100) within sector
+    ranks = factors.groupby(groups, dropna=False).rank(pct=True).to_numpy() * 100
+
+    composite = ranks @ np.array([
+        STOCK_WEIGHT_REL_STRENGTH,
+        STOCK_WEIGHT_REV_GROWTH,
+        STOCK_WEIGHT_ROE,
+        STOCK_WEIGHT_ROIC,
+    ])
+
+    # Leader >= 80, Laggard <= 30
+    leader_laggard = np.select([composite >= 80, composite <= 30], ["Leader", "Laggard"], default="Neutral")
+
+    rank = pd.Series(composite).groupby(groups, dropna=False).rank(ascending=False, method='min').to_numpy()
+
+    return {
+        'rel_strength_rank_pct': ranks[:, 0],
+        'revenue_growth_rank_pct': ranks[:, 1],
+        'roe_rank_pct': ranks[:, 2],
+        'roic_rank_pct': ranks[:, 3],
+        'composite_score': composite,
+        'leader_laggard': leader_laggard,
+        'rank': rank,
+    }
+
+def apply_stock_scores(stocks: List[Dict]) -> List[Dict]:
+    """
+    Fill composite_score, leader_laggard and rank on provider stock dicts, ranking each
+    stock within its own sector. Dicts are updated in place and returned.
+    """
+    if not stocks:
+        return stocks
+
+    def column(key: str) -> np.ndarray:
+        return np.fromiter((s.get(key) or 0.0 for s in stocks), dtype=float, count=len(stocks))
+
+    scores = score_universe(
+        column('rel_strength_3m'),
+        column('revenue_growth'),
+        column('roe'),
+        column('roic'),
+        np.array([s.get('sector_id') for s in stocks], dtype=object),
+    )
+
+    composite = scores['composite_score'].tolist()
+    leader_laggard = scores['leader_laggard'].tolist()
+    rank = scores['rank'].astype(int).tolist()
+    for i, s in enumerate(stocks):
+        s['composite_score'] = composite[i]
+        s['leader_laggard'] = leader_laggard[i]
+        s['rank'] = rank[i]
+    return stocks
+
 def calculate_stock_scores(stocks: List[Dict]) -> List[Dict]:
     """
     Calculate composite scores and ranks for a list of stocks within the same sector.
@@ -36,79 +113,74 @@ def calculate_stock_scores(stocks: List[Dict]) -> List[Dict]:
             df[col] = 0.0
         df[col] = df[col].fillna(0.0)
 
-    # Calculate percentile ranks (0-100)
-    # rank(pct=True) returns 0.0 to 1.0. Multiply by 100.
-    df['rel_strength_rank_pct'] = df['rel_strength_3m'].rank(pct=True) * 100
-    df['revenue_growth_rank_pct'] = df['revenue_growth'].rank(pct=True) * 100
-    df['roe_rank_pct'] = df['roe'].rank(pct=True) * 100
-    df['roic_rank_pct'] = df['roic'].rank(pct=True) * 100
-    
-    # Calculate composite score
-    df['composite_score'] = (
-        (df['rel_strength_rank_pct'] * STOCK_WEIGHT_REL_STRENGTH) +
-        (df['revenue_growth_rank_pct'] * STOCK_WEIGHT_REV_GROWTH) +
-        (df['roe_rank_pct'] * STOCK_WEIGHT_ROE) +
-        (df['roic_rank_pct'] * STOCK_WEIGHT_ROIC)
+    scores = score_universe(
+        df['rel_strength_3m'].to_numpy(),
+        df['revenue_growth'].to_numpy(),
+        df['roe'].to_numpy(),
+        df['roic'].to_numpy(),
+        np.zeros(len(df), dtype=int),
     )
-    
-    # Leader/Laggard
-    # Leader >= 80, Laggard <= 30
-    def categorize(score):
-        if score >= 80:
-            return "Leader"
-        elif score <= 30:
-            return "Laggard"
-        else:
-            return "Neutral" # Or just empty/middle
-            
-    df['leader_laggard'] = df['composite_score'].apply(categorize)
-    
-    # Rank within list
-    df['rank'] = df['composite_score'].rank(ascending=False, method='min')
+    for col, values in scores.items():
+        df[col] = values
     
     return df.to_dict('records')
 
+def sector_score_trend(rel_perf_1m, rel_perf_primary) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Relative performance score (50 + 2 x relative performance over the primary period, 3m
+    by default, clamped to 0-100; weighted into sector_composite_score) and trend label (1m momentum agreeing with the primary period),
+    elementwise over arrays of any shape (one sector, all sectors, or dates x sectors).
+    """
+    rel_perf_1m = np.asarray(rel_perf_1m, dtype=float)
+    rel_perf_primary = np.asarray(rel_perf_primary, dtype=float)
+
+    score = np.clip(50 + rel_perf_primary * 2, 0, 100)
+    trend = np.select(
+        [(rel_perf_1m > 2) & (rel_perf_primary > 0), (rel_perf_1m < -2) & (rel_perf_primary < 0)],
+        ["Improving", "Deteriorating"],
+        default="Stable",
+    )
+    return score, trend
+
+def volatility_rank_pct(volatility: Union[pd.Series, pd.DataFrame]) -> Union[pd.Series, pd.DataFrame]:
+    """
+    Percentile rank (0-100) of realized volatility across sectors, calmest highest.
+    A dates x sectors frame is ranked within each date.
+    """
+    axis = 1 if isinstance(volatility, pd.DataFrame) else 0
+    return volatility.rank(axis=axis, ascending=False, pct=True) * 100
+
+def sector_composite_score(rel_perf_score, trend, vol_rank_pct) -> np.ndarray:
+    """
+    Weighted sector score: relative performance score (see sector_score_trend), trend
+    score and volatility rank, elementwise over arrays of any shape. A missing
+    volatility rank counts as neutral (50).
+    """
+    trend = np.asarray(trend)
+    trend_score = np.select(
+        [trend == "Improving", trend == "Deteriorating"],
+        [TREND_SCORES["Improving"], TREND_SCORES["Deteriorating"]],
+        default=TREND_SCORES["Stable"],
+    )
+    vol_score = np.nan_to_num(np.asarray(vol_rank_pct, dtype=float), nan=50.0)
+    return (
+        np.asarray(rel_perf_score, dtype=float) * SECTOR_WEIGHT_REL_PERF
+        + trend_score * SECTOR_WEIGHT_TREND
+        + vol_score * SECTOR_WEIGHT_VOLATILITY
+    )
+
 def calculate_sector_scores(sectors: List[Dict]) -> List[Dict]:
     """
-    Calculate sector scores.
+    Fill score on sector dicts carrying rel_perf_1m, rel_perf_3m, trend and (optionally)
+    volatility_rank_pct. Dicts are updated in place and returned.
     """
     if not sectors:
-        return []
+        return sectors
 
     df = pd.DataFrame(sectors)
-    
-    # Example logic for sector scoring if not already provided
-    # PRD says it uses rel_perf_3m_normalized, trend_score, volatility_rank_pct
-    # We might not have volatility in input, assuming it's passed or we skip it if missing.
-    
-    # Check provided columns
-    if 'rel_perf_3m' not in df.columns:
-        return sectors # Can't calc
-        
-    # Normalize rel_perf_3m to 0-100 range for scoring? 
-    # Or PRD implies specific normalization logic?
-    # "rel_perf_3m_normalized"
-    # Let's map min-max of rel_perf_3m to 0-100
-    min_perf = df['rel_perf_3m'].min()
-    max_perf = df['rel_perf_3m'].max()
-    if max_perf != min_perf:
-        df['rel_perf_normalized'] = (df['rel_perf_3m'] - min_perf) / (max_perf - min_perf) * 100
-    else:
-        df['rel_perf_normalized'] = 50.0
-        
-    df['trend_score_val'] = df['trend'].map(TREND_SCORES).fillna(50)
-    
-    # Volatility? If not present, maybe ignore or assume constant weight distribution adjust
-    # For now, if missing, re-distribute weight? Or assume 50.
-    vol_score = 50.0
-    
-    df['score_calculated'] = (
-        (df['rel_perf_normalized'] * SECTOR_WEIGHT_REL_PERF) +
-        (df['trend_score_val'] * SECTOR_WEIGHT_TREND) +
-        (vol_score * SECTOR_WEIGHT_VOLATILITY) # Placeholder
-    )
-    
-    # Note: PRD says "score" is in DB. We might not need to overwrite it if it's already there.
-    # But for "live" data, we would.
-    
-    return df.to_dict('records')
+    rel_perf_score, _ = sector_score_trend(df['rel_perf_1m'], df['rel_perf_3m'])
+    vol_rank = df['volatility_rank_pct'] if 'volatility_rank_pct' in df.columns else np.nan
+    scores = sector_composite_score(rel_perf_score, df['trend'], vol_rank).tolist()
+    for s, score in zip(sectors, scores):
+        s['score'] = score
+    return sectors
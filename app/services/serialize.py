@@ -0,0 +1,15 @@
+from typing import Dict, List, Union
+import pandas as pd
+
+
+def price_history(closes: pd.Series, compact: bool = False) -> Union[List[Dict], Dict[str, List]]:
+    """
+    A dated close series converted to JSON-ready lists in bulk (one strftime over the
+    index, one tolist over the values); NaN closes become 0.0. compact gives
+    {"dates": [...], "close": [...]}, otherwise a list of {"date", "close"} dicts.
+    """
+    dates = pd.DatetimeIndex(closes.index).strftime("%Y-%m-%d").tolist()
+    close = closes.astype(float).fillna(0.0).tolist()
+    if compact:
+        return {"dates": dates, "close": close}
+    return [{"date": d, "close": c} for d, c in zip(dates, close)]
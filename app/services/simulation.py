@@ -0,0 +1,106 @@
+import itertools
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+from app.services import rebalance
+
+# Each sweep starts its own pool inside an API worker, so keep the default small
+SIMULATION_WORKERS = int(os.getenv("SIMULATION_WORKERS", str(min(4, os.cpu_count() or 1))))
+MAX_SIMULATION_POINTS = int(os.getenv("MAX_SIMULATION_POINTS", "500"))
+
+# Grid axes that can be swept; anything else in the constraint set is held fixed
+SWEEP_KEYS = ("max_stock_weight", "max_sector_cap", "max_trades_per_run")
+
+# Rebalance state installed once per worker process by the pool initializer; never set
+# in the API process itself
+_state: Dict[str, Any] = {}
+
+
+def grid_size(axes: Dict[str, Optional[Sequence[float]]]) -> int:
+    """
+    Number of constraint sets constraint_grid will produce for axes, without building them.
+    """
+    return math.prod(len(axes[k]) for k in SWEEP_KEYS if axes.get(k))
+
+
+def constraint_grid(base: Dict[str, float], axes: Dict[str, Optional[Sequence[float]]]) -> List[Dict[str, float]]:
+    """
+    Every combination of the swept axes over the base constraint set. An empty or missing
+    axis keeps the base value.
+    """
+    keys = [k for k in SWEEP_KEYS if axes.get(k)]
+    grid = []
+    for combo in itertools.product(*(axes[k] for k in keys)):
+        grid.append({**base, **dict(zip(keys, combo))})
+    return grid
+
+
+def summarize_suggestions(
+    sector_exposure: List[Dict],
+    suggestions: List[Dict],
+    stocks: List[Dict],
+    total_value_cr: float
+) -> Dict[str, float]:
+    turnover_cr = sum(s['est_value_cr'] for s in suggestions)
+    return {
+        "drift_after": round(rebalance.estimate_drift_after(sector_exposure, suggestions, stocks, total_value_cr), 2),
+        "turnover_cr": round(turnover_cr, 2),
+        "turnover_pct": round(turnover_cr / total_value_cr * 100, 2) if total_value_cr > 0 else 0.0,
+        "trade_count": len(suggestions),
+    }
+
+
+def _init_worker(state: Dict[str, Any]) -> None:
+    _state.clear()
+    _state.update(state)
+
+
+def _evaluate_with(state: Dict[str, Any], constraints: Dict[str, float]) -> Dict[str, Any]:
+    suggestions = rebalance.ENGINES[state["engine"]](
+        holdings=state["holdings"],
+        sector_exposure=state["sector_exposure"],
+        stocks=state["stocks"],
+        constraints=constraints,
+    )
+    return {
+        "constraints": {k: constraints[k] for k in SWEEP_KEYS if k in constraints},
+        **summarize_suggestions(state["sector_exposure"], suggestions, state["stocks"], state["total_value_cr"]),
+    }
+
+
+def _evaluate(constraints: Dict[str, float]) -> Dict[str, Any]:
+    # Pool workers only: the state installed by _init_worker
+    return _evaluate_with(_state, constraints)
+
+
+def simulate(state: Dict[str, Any], grid: List[Dict[str, float]], engine: str = "greedy") -> List[Dict[str, Any]]:
+    """
+    Run the engine for every constraint set in grid against one fetched state, without
+    persisting anything. The state is shipped to each worker once via the pool
+    initializer, so only the constraint sets and summaries cross process boundaries.
+    Workers are started by forkserver rather than forked from the (threaded) API process.
+    Results are in grid order.
+    """
+    worker_state = {
+        "engine": engine,
+        "holdings": state["holdings"],
+        "sector_exposure": state["sector_exposure"],
+        "stocks": state["stocks"],
+        "total_value_cr": state["total_value_cr"],
+    }
+
+    workers = min(SIMULATION_WORKERS, len(grid))
+    if workers <= 1:
+        # Inline in the API process, where concurrent sweeps must not share _state
+        return [_evaluate_with(worker_state, c) for c in grid]
+
+    chunksize = max(1, len(grid) // (workers * 4))
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("forkserver"),
+        initializer=_init_worker,
+        initargs=(worker_state,),
+    ) as pool:
+        return list(pool.map(_evaluate, grid, chunksize=chunksize))
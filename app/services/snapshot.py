@@ -0,0 +1,101 @@
+import logging
+from datetime import date
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from app.db.session import session_scope
+from app.providers.base import StockDataProvider
+from app.providers.yfinance.stock import YfinanceStockDataProvider
+from app.providers.warehouse.stock import WarehouseStockDataProvider
+from app.repositories.scores import upsert_scores
+from app.services.scoring import score_universe
+
+logger = logging.getLogger(__name__)
+
+# Market data source name -> stock provider, as selected by MARKET_DATA_SOURCE in the API
+STOCK_PROVIDERS = {
+    "yfinance": YfinanceStockDataProvider,
+    "warehouse": WarehouseStockDataProvider,
+}
+
+
+def score_frame(frame: pd.DataFrame) -> List[Dict]:
+    """
+    stock_scores rows from a long frame with ticker, date, sector_id and the factor
+    columns: composite score, rank, sector size, percentile and component percentile
+    ranks, ranked within each (date, sector) in one pass.
+    """
+    frame = frame.reset_index(drop=True)
+    for col in ('rel_strength_3m', 'revenue_growth', 'roe', 'roic'):
+        if col not in frame.columns:
+            frame[col] = 0.0
+
+    dates = frame['date'].to_numpy()
+    sector_ids = frame['sector_id'].to_numpy(dtype=object)
+    scores = score_universe(
+        frame['rel_strength_3m'].to_numpy(dtype=float),
+        frame['revenue_growth'].to_numpy(dtype=float),
+        frame['roe'].to_numpy(dtype=float),
+        frame['roic'].to_numpy(dtype=float),
+        sector_ids,
+        dates=dates,
+    )
+
+    total = frame.groupby([dates, sector_ids], dropna=False)['ticker'].transform('size').to_numpy()
+    rank = scores['rank'].astype(int)
+    percentile = 100 - (rank / total * 100)
+
+    rows = pd.DataFrame({
+        'ticker': frame['ticker'],
+        'date': frame['date'],
+        'sector_id': frame['sector_id'],
+        'composite_score': np.round(scores['composite_score'], 2),
+        'rank': rank,
+        'total': total,
+        'percentile': np.round(percentile, 2),
+        'leader_laggard': scores['leader_laggard'],
+        'rel_strength_rank_pct': np.round(scores['rel_strength_rank_pct'], 2),
+        'revenue_growth_rank_pct': np.round(scores['revenue_growth_rank_pct'], 2),
+        'roe_rank_pct': np.round(scores['roe_rank_pct'], 2),
+        'roic_rank_pct': np.round(scores['roic_rank_pct'], 2),
+    })
+    rows = rows.astype(object).where(rows.notna(), None)
+    return rows.to_dict('records')
+
+
+def score_rows(stocks: List[Dict], as_of: date) -> List[Dict]:
+    """
+    stock_scores rows for one snapshot date from provider stock dicts.
+    """
+    frame = pd.DataFrame(stocks)
+    frame['date'] = as_of
+    return score_frame(frame)
+
+
+def snapshot_stock_scores(db: Session, provider: StockDataProvider, as_of: Optional[date] = None) -> int:
+    """
+    Score the whole universe from the provider's current metrics and upsert the snapshot
+    for as_of (today by default). Does not commit.
+    """
+    stocks = provider.get_stocks_for_sectors(None)
+    if not stocks:
+        logger.warning("No stock metrics available; score snapshot skipped")
+        return 0
+
+    return upsert_scores(db, score_rows(stocks, as_of or date.today()))
+
+
+def run_scoring(source: str = "yfinance", as_of: Optional[date] = None) -> int:
+    """
+    snapshot_stock_scores against the named source's provider, committed.
+    """
+    if source not in STOCK_PROVIDERS:
+        raise ValueError(f"Unknown market data source '{source}'")
+
+    with session_scope() as db:
+        written = snapshot_stock_scores(db, STOCK_PROVIDERS[source](db), as_of)
+
+    logger.info(f"Wrote {written} stock score rows")
+    return written
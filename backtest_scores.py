@@ -0,0 +1,26 @@
+import sys
+import os
+import argparse
+import logging
+
+# Add backend to path
+sys.path.append(os.getcwd())
+
+from app.services.backtest import run_backtest, BACKTEST_SOURCES
+
+logging.basicConfig(level=logging.INFO)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild daily sector_performance and stock_scores history.")
+    parser.add_argument("--years", type=int, default=2,
+                        help="Years of daily history to compute (default: %(default)s)")
+    parser.add_argument("--source", choices=BACKTEST_SOURCES, default=os.getenv("MARKET_DATA_SOURCE", "yfinance"),
+                        help="Where to read closes from (default: %(default)s)")
+    args = parser.parse_args()
+
+    print(f"Backtest complete: {run_backtest(args.years, args.source)}")
+
+
+if __name__ == "__main__":
+    main()
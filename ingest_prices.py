@@ -0,0 +1,36 @@
+import sys
+import os
+import time
+import argparse
+import logging
+
+# Add backend to path
+sys.path.append(os.getcwd())
+
+from app.services.ingest import run_ingestion, DEFAULT_BACKFILL_PERIOD
+
+logging.basicConfig(level=logging.INFO)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch missing daily bars from yfinance into the price warehouse.")
+    parser.add_argument("--backfill", default=DEFAULT_BACKFILL_PERIOD,
+                        help="yfinance period to fetch for tickers with no stored bars (default: %(default)s)")
+    parser.add_argument("--every", type=int, default=0,
+                        help="Keep running and ingest every N minutes (default: run once and exit)")
+    args = parser.parse_args()
+
+    if args.every <= 0:
+        print(f"Ingestion complete: {run_ingestion(args.backfill)}")
+        return
+
+    while True:
+        try:
+            print(f"Ingestion complete: {run_ingestion(args.backfill)}")
+        except Exception:
+            logging.exception("Ingestion pass failed; retrying on next interval")
+        time.sleep(args.every * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.endpoints import sectors, stocks, portfolio, rebalance, audit
+from app.services.audit import audit_sink
+from app.services.jobs import rebalance_jobs
 
 app = FastAPI(title="India Sector Insights & Portfolio Rebalancing")
 
@@ -11,6 +13,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Routes
@@ -20,6 +23,16 @@ app.include_router(portfolio.router, prefix="/api/portfolio", tags=["portfolio"]
 app.include_router(rebalance.router, prefix="/api/rebalance", tags=["rebalance"])
 app.include_router(audit.router, prefix="/api", tags=["audit"]) # Audit is at /api/audit-log and constraints
 
+@app.on_event("startup")
+def start_audit_sink():
+    audit_sink.start()
+
+@app.on_event("shutdown")
+def stop_audit_sink():
+    # Let running rebalance jobs finish, then durably write any audit events still queued
+    rebalance_jobs.shutdown()
+    audit_sink.stop()
+
 @app.get("/")
 def root():
     return {"message": "System is running"}
@@ -35,3 +48,10 @@ def test_yf():
         return {"yfinance_reachable": not data.empty, "rows": len(data), "error": None}
     except Exception as e:
         return {"yfinance_reachable": False, "rows": 0, "error": str(e), "traceback": traceback.format_exc()}
+
+
+@app.get("/cache-stats")
+def cache_stats():
+    """Diagnostic endpoint — hit/miss counters and size of the in-process price cache."""
+    from app.providers.yfinance._cache import price_cache
+    return price_cache.stats()
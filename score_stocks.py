@@ -0,0 +1,27 @@
+import sys
+import os
+import argparse
+import logging
+from datetime import date
+
+# Add backend to path
+sys.path.append(os.getcwd())
+
+from app.services.snapshot import run_scoring, STOCK_PROVIDERS
+
+logging.basicConfig(level=logging.INFO)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshot composite scores and in-sector ranks into stock_scores.")
+    parser.add_argument("--source", choices=sorted(STOCK_PROVIDERS), default=os.getenv("MARKET_DATA_SOURCE", "yfinance"),
+                        help="Market data source for the stock metrics (default: %(default)s)")
+    parser.add_argument("--date", type=date.fromisoformat, default=None,
+                        help="Snapshot date, YYYY-MM-DD (default: today)")
+    args = parser.parse_args()
+
+    print(f"Scoring complete: {run_scoring(args.source, args.date)} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,8 @@ from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 import pandas as pd
 import numpy as np
+from alembic import command
+from alembic.config import Config
 
 # Add backend to path
 sys.path.append(os.getcwd())
@@ -15,6 +17,8 @@ from app.models.models import Sector, SectorPerformance, Stock, StockPrice, Port
 # Setup
 def init_db():
     Base.metadata.create_all(bind=engine)
+    # create_all builds the current schema, so record it as migrated
+    command.stamp(Config(os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini")), "head")
 
 def seed_sectors(db: Session):
     print("Seeding sectors...")